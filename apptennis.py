@@ -4,7 +4,7 @@ import pandas as pd
 import numpy as np
 import json
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime
 import pytz
 import re
 
@@ -20,22 +20,12 @@ if ROOT_DIR not in sys.path:
 # Remaining imports for your app logic
 # ============================================================
 from shared.utils import (
-    get_league_today, hit_rate_threshold, trim_df_to_recent_82,
-    dedupe_columns, strip_display_ids, norm_name,
-    get_teams_playing_on_date, compute_hit_rates
+    get_league_today, hit_rate_thresholds,
+    pack_player_games, cast_like, strip_display_ids,
 )
-from nba.helpers import (
-    DEF_STAT_MAP, load_nba_schedule, load_today_matchups,
-    load_nba_injury_status, parse_nba_matchup,
-    add_team_opponent_columns, compute_player_percentiles,
-    load_todays_schedule, compute_team_b2b_from_schedule,
-    normalize_nba_position, normalize_nba_position_display,
-    add_combo_stats, load_nba_raw_data, load_defense_tables
-)
-from nba.nbadefense import get_team_def_ranks, get_team_def_ranks_by_position
 
-# NHL helper functions
-from nhl.helpers import get_nhl_todays_schedule, compute_nhl_b2b, analyze_nhl_players, get_nhl_teams_on_date, get_nhl_injuries
+# Sport helpers (nba.helpers, nhl.helpers, tennis.helpers) are imported
+# inside their section below, so a rerun only loads the selected sport
 
 # ============================================================
 # PAGE CONFIG
@@ -67,6 +57,15 @@ else:
 # ============================================================
 # HEADER BANNER (hero header with title + date)
 # ============================================================
+@st.cache_resource
+def banner_data_uri(image_path):
+    """
+    The banner image as a base64 data URI, encoded once per server
+    process instead of on every rerun.
+    """
+    with open(image_path, "rb") as f:
+        return "data:image/png;base64," + base64.b64encode(f.read()).decode()
+
 def set_header_banner(image_path, image_width=1500, image_height=150):
     """
     Sets a full-width hero banner at the top of the page, preserving the entire image.
@@ -75,9 +74,6 @@ def set_header_banner(image_path, image_width=1500, image_height=150):
     """
     aspect_ratio_pct = (image_height / image_width) * 100  # padding-top % to preserve aspect ratio
 
-    with open(image_path, "rb") as f:
-        data = base64.b64encode(f.read()).decode()
-
     st.markdown(f"""
     <style>
     /* ===== REMOVE STREAMLIT FULLSCREEN TOOLBAR (GLOBAL) ===== */
@@ -103,7 +99,7 @@ def set_header_banner(image_path, image_width=1500, image_height=150):
         width: 100%;
         height: 0;
         padding-top: {aspect_ratio_pct:.2f}%;
-        background-image: url("data:image/png;base64,{data}");
+        background-image: url("{banner_data_uri(image_path)}");
         background-size: contain;       /* scale image fully inside container */
         background-repeat: no-repeat;
         background-position: center top;
@@ -431,6 +427,20 @@ def calc_nfl_pfr_hit_rates(
     df["Pos"] = df["Pos"].astype(str)
     df["Opp"] = df["Opp"].astype(str)
 
+    # Hit-rate thresholds for every player in one pass (latest week first)
+    present_cols = {col: abbr for col, abbr in stat_cols.items() if col in df.columns}
+    recent_df = df.sort_values("Week", ascending=False, kind="stable", na_position="first")
+    keys, tensor, _ = pack_player_games(recent_df, "Name", list(present_cols))
+    player_idx = {name: i for i, name in enumerate(keys)}
+    games = np.moveaxis(tensor, 1, -1)  # players x stats x games
+
+    thr_all = np.nan_to_num(hit_rate_thresholds(games, percentages), nan=0)
+    thr_recent = None
+    if recent_n is not None:
+        thr_recent = np.nan_to_num(hit_rate_thresholds(games[..., :recent_n], percentages), nan=0)
+
+    col_dtypes = {col: pd.to_numeric(df[col], errors="coerce").dtype for col in present_cols}
+
     results = []
 
     for player, g in df.groupby("Name", sort=False):
@@ -471,20 +481,16 @@ def calc_nfl_pfr_hit_rates(
         # ----------------------------------
         # Hit-rate calculations
         # ----------------------------------
-        recent = g if recent_n is None else g.tail(recent_n)
-
-        for col, abbr in stat_cols.items():
-            if col not in g.columns:
-                continue
+        i = player_idx[player]
 
-            vals_all = pd.to_numeric(g[col], errors="coerce").dropna().tolist()
-            vals_recent = pd.to_numeric(recent[col], errors="coerce").dropna().tolist()
+        for j, (col, abbr) in enumerate(present_cols.items()):
+            dtype = col_dtypes[col]
 
-            for pct in percentages:
-                row[f"{abbr}@{pct}"] = hit_rate_threshold(vals_all, pct)
+            for k, pct in enumerate(percentages):
+                row[f"{abbr}@{pct}"] = cast_like(thr_all[i, j, k], dtype)
 
                 if recent_n is not None:
-                    row[f"L{recent_n}{abbr}@{pct}"] = hit_rate_threshold(vals_recent, pct)
+                    row[f"L{recent_n}{abbr}@{pct}"] = cast_like(thr_recent[i, j, k], dtype)
 
         results.append(row)
 
@@ -495,12 +501,14 @@ def calc_nfl_pfr_hit_rates(
 ############################################################
 if sport_choice == "NBA":
 
+    from nba.helpers import nba_data_version, nba_slate_version, nba_injury_status, nba_hit_rate_table
+
     #st.subheader("NBA — Player Hit Rate Analysis")
     #nba_today = get_league_today()
     #st.caption(f"NBA date: {nba_today.strftime('%b %d')} (rolls over at 3:00 AM CT)")
 
-    # --- Load core NBA data (cached) ---
-    df, team_totals_df, pos_df = load_nba_raw_data()
+    # --- Data version (part of the Calculate cache key) ---
+    nba_version = nba_data_version()
 
     # --- Sidebar Filters ---
     with st.sidebar.form("NBA Filters"):
@@ -522,10 +530,15 @@ if sport_choice == "NBA":
         reverse_lookup = {v: k for k, v in name_map.items()}
         stats_selected = [reverse_lookup.get(d, d) for d in stats_selected_display]
 
-        percentages = [st.slider("Hit Rate Percentage", 40, 100, 80, 5)]
+        percentages = sorted(st.multiselect(
+            "Hit Rate Percentages", list(range(40, 101, 5)), default=[80]
+        )) or [80]
 
-        player_window = st.radio("Player Performance Window", ["L5", "L10", "ALL"], index=0)
-        recent_n = 5 if player_window == "L5" else 10 if player_window == "L10" else None
+        player_windows = st.multiselect(
+            "Player Performance Windows", ["L5", "L10"], default=["L5"],
+            help="Season (ALL) columns are always shown"
+        )
+        recent_n = [5 if w == "L5" else 10 for w in ["L5", "L10"] if w in player_windows]
 
         defense_window = st.radio("Opponent Defensive Window", ["L5", "L10", "ALL"], index=0)
 
@@ -540,124 +553,26 @@ if sport_choice == "NBA":
     # --- Calculate button ---
     if calculate:
 
-        # Trim to most recent 82 games per player
-        df_calc = trim_df_to_recent_82(df)
-
-        # --- Cached Defense Tables ---
-        overall_def, pos_def_df = load_defense_tables(defense_window)
-
-        # Pivot overall_def to create lookup table by opponent
-        opponent_def = pd.DataFrame(index=overall_def["OPP_TEAM"].unique())
-
-        for stat in DEF_STAT_MAP:
-            avg_col, rank_col = DEF_STAT_MAP[stat]
-
-            stat_df = overall_def[overall_def["STAT"] == stat].set_index("OPP_TEAM")
-            opponent_def[avg_col] = stat_df["AVG_ALLOWED"]
-            opponent_def[rank_col] = stat_df["RANK"]
-
-        # Export debug CSVs if requested
-        #if debug_defense_csv:
-            #opponent_def.to_csv("debug_nba_defense_overall.csv", index=True)
-            #pos_def_df.to_csv("debug_nba_defense_positional.csv", index=False)
-
-        # --- Load schedule & compute B2B map ---
-        schedule_data = load_nba_schedule()
-        todays_teams, today_matchups = load_today_matchups()
-        team_b2b_map = compute_team_b2b_from_schedule(schedule_data)
-
-        # Filter players to today's teams if selected
-        if filter_today and todays_teams:
-            latest_team = (
-                df_calc.sort_values(["player_id", "GAME_DATE"], ascending=[True, False])
-                       .groupby("player_id")["Team"]
-                       .first()
-            )
-            eligible = latest_team[latest_team.isin(todays_teams)].index
-            df_calc = df_calc[df_calc["player_id"].isin(eligible)]
-
-        # --- Compute Hit Rate Percentiles ---
-        summary_df = compute_player_percentiles(
-            df_calc,
+        # Injuries are read outside the cached table, so a failed read
+        # warns on every run instead of being cached
+        slate_version = nba_slate_version()
+        injury_status, injury_error = nba_injury_status(slate_version)
+        if injury_error:
+            st.warning(injury_error)
+
+        # Final table, cached per data version, slate and form inputs
+        summary_df = nba_hit_rate_table(
+            nba_version,
+            slate_version,
+            injury_status,
             stats_selected,
             percentages,
             recent_n,
-            opponent_def=opponent_def,
-            today_matchups=today_matchups,
-            show_positional_def=show_positional_def,
-            pos_def_df=pos_def_df,
+            defense_window,
+            show_positional_def,
+            filter_today,
         )
 
-        # --- Rename stat columns for display ---
-        stat_abbrev_map = {
-            "PTS": "P", "REB": "R", "AST": "A", "OREB": "OR", "DREB": "DR",
-            "PRA": "PRA", "PR": "PR", "PA": "PA", "RA": "RA",
-            "BLK": "BLK", "STL": "S", "TOV": "TO",
-            "FG3M": "3PM", "FG3A": "3PA"
-        }
-
-        def rename_stat_columns(col):
-            for stat, short in stat_abbrev_map.items():
-                if col.startswith(stat):
-                    return col.replace(stat, short, 1)
-                if col.startswith("L") and stat in col:
-                    return col.replace(stat, short, 1)
-            return col
-
-        summary_df = summary_df.rename(columns=rename_stat_columns)
-
-        # --- Add B2B and injury status ---
-        summary_df["B2B"] = summary_df["Team"].map(team_b2b_map).fillna("N")
-
-        # --- Load NBA injury statuses robustly ---
-        try:
-            # Load the injuries CSV
-            inj_df = pd.read_csv("nba/data/nbaplayerstatus.csv")
-
-            # Convert player_id to int first (to remove any .0) then to str for mapping
-            inj_df["player_id"] = inj_df["player_id"].fillna(0).astype(int).astype(str)
-            summary_df["player_id"] = summary_df["player_id"].astype(int).astype(str)
-
-            # Create mapping dict
-            inj_map = dict(zip(inj_df["player_id"], inj_df["Status_norm"]))
-
-            # Map Status to summary_df
-            summary_df["Status"] = summary_df["player_id"].map(inj_map).fillna("A")
-
-        except Exception as e:
-            st.warning(f"Unable to load NBA injuries: {e}")
-            summary_df["Status"] = "A"
-
-        # --- Column order ---
-        base_cols = ["Player", "Pos", "Team", "Opp", "B2B", "Status", "Gms"]
-        ordered_stat_cols = []
-
-        for stat in stats_selected:
-            display_stat = stat_abbrev_map.get(stat, stat)
-            pct_col = f"{display_stat}@{int(percentages[-1])}"
-            if pct_col in summary_df.columns:
-                ordered_stat_cols.append(pct_col)
-
-            if recent_n:
-                recent_col = f"L{recent_n}{display_stat}@{int(percentages[-1])}"
-                if recent_col in summary_df.columns:
-                    ordered_stat_cols.append(recent_col)
-
-            if stat in DEF_STAT_MAP:
-                a_col, r_col = DEF_STAT_MAP[stat]
-                if a_col in summary_df.columns:
-                    ordered_stat_cols.append(a_col)
-                if r_col in summary_df.columns:
-                    ordered_stat_cols.append(r_col)
-
-        cols_ordered = [c for c in base_cols + ordered_stat_cols if c in summary_df.columns]
-        summary_df = summary_df[cols_ordered]
-
-        # --- Sort & display ---
-        sort_col = f"{stat_abbrev_map.get(stats_selected[0], stats_selected[0])}@{int(percentages[-1])}"
-        if sort_col in summary_df.columns:
-            summary_df = summary_df.sort_values(sort_col, ascending=False)
-
         col_config = {
             "Player": st.column_config.Column(pinned="left"),
             "Pos": st.column_config.Column(pinned="left"),
@@ -909,13 +824,15 @@ elif sport_choice == "NFL":
 ############################################################
 elif sport_choice == "NHL":
 
-    # --- Load NHL CSV automatically ---
+    from nhl.helpers import nhl_data_version, nhl_slate_version, load_nhl_raw_data, nhl_hit_rate_table
+
+    # --- Load NHL CSV automatically (parsed once per data refresh) ---
+    nhl_version = nhl_data_version()
     try:
-        nhl_df = pd.read_csv("nhl/data/nhlplayergamelogs.csv").fillna(0)
-        nhl_df.columns = dedupe_columns(nhl_df.columns)
+        nhl_frames = load_nhl_raw_data(nhl_version)
     except Exception as e:
         st.error(f"Could not load nhlplayergamelogs.csv: {e}")
-        nhl_df = pd.DataFrame()
+        nhl_frames = {}
 
     # --- Player Type (REACTIVE) ---
     player_type_choice = st.sidebar.radio(
@@ -928,26 +845,10 @@ elif sport_choice == "NHL":
     if player_type_choice == "Skaters":
         all_stats = ["TOI","G","A","P","S","H","B","PPP","FOW"]
         default_stats = ["G","A","P","S","H"]
-        stat_map = {
-            "TOI": "toi_minutes",
-            "G": "goals",
-            "A": "assists",
-            "P": "points",
-            "S": "shots",
-            "H": "hits",
-            "B": "blocks",
-            "PPP": "pp_points",
-            "FOW": "faceoffs_won"
-        }
     else:
         all_stats = ["SA","GA","SV","SV%"]
         default_stats = ["SA","GA","SV","SV%"]
-        stat_map = {
-            "SA": "shots_against",
-            "GA": "goals_against",
-            "SV": "saves",
-            "SV%": "save_pct"
-        }
+    nhl_df = nhl_frames.get(player_type_choice, pd.DataFrame())
 
     # --- Sidebar Form ---
     with st.sidebar.form(key="nhl_form"):
@@ -959,16 +860,17 @@ elif sport_choice == "NHL":
             key=f"nhl_stats_{player_type_choice}"
         )
 
-        nhl_percent_slider = st.slider(
-            "Hit Rate Percentage",
-            min_value=40, max_value=100, step=5, value=80
-        )
+        nhl_percents = sorted(st.multiselect(
+            "Hit Rate Percentages",
+            options=list(range(40, 101, 5)),
+            default=[80]
+        )) or [80]
 
-        nhl_player_window = st.radio(
-            "Player Performance Window",
+        nhl_player_windows = st.multiselect(
+            "Player Performance Windows",
             ["L5", "L10", "ALL"],
-            index=0
-        )
+            default=["L5"]
+        ) or ["ALL"]
 
         # --- Opponent Window (dynamic label) ---
         opp_window_label = "Opponent Defensive Window" if player_type_choice == "Skaters" else "Opponent Offensive Window"
@@ -985,81 +887,22 @@ elif sport_choice == "NHL":
     # --- Only run analysis after submit ---
     if submit_btn and not nhl_df.empty:
 
-        nhl_recent_pct = nhl_percent_slider / 100.0
-
-        # Map windows to recent_n
-        recent_map = {"L5": 5, "L10": 10, "ALL": None}
-        nhl_recent_n = recent_map[nhl_player_window]
-        opp_recent_n = recent_map[nhl_opp_window]
-
-        # Today's schedule
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        nhl_todays, nhl_opp_map = get_nhl_todays_schedule(today_str)
-
-        # Team games (for opponent window)
-        nhlteamgames_df = pd.read_csv("nhl/data/nhlteamgames.csv")
-
-        # Team defense/offense (optional CSV fallback)
-        try:
-            team_def = pd.read_csv("nhl/data/nhlteamgametotals.csv").set_index("Team")
-        except:
-            team_def = pd.DataFrame()
-
-        # B2B mapping
-        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-        tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-        nhl_b2b_map = compute_nhl_b2b(
-            get_nhl_teams_on_date(today_str),
-            get_nhl_teams_on_date(yesterday),
-            get_nhl_teams_on_date(tomorrow)
+        # Final table, cached per data version, slate and form inputs
+        nhl_out = nhl_hit_rate_table(
+            nhl_version,
+            nhl_slate_version(),
+            player_type_choice,
+            nhl_stats_selected,
+            nhl_percents,
+            nhl_player_windows,
+            nhl_opp_window,
+            nhl_filter_today,
         )
 
-        injuries_df = pd.read_csv("nhl/data/nhlplayerstatus.csv")
-        inj_status_map = {norm_name(row["Player"]): row["Status_norm"] for _, row in injuries_df.iterrows()}
-
-        # --- Player Analysis: ALL season stats ---
-        nhl_all = analyze_nhl_players(
-            nhl_df=nhl_df,
-            nhl_stats_selected=nhl_stats_selected,
-            stat_map=stat_map,
-            recent_n=nhl_recent_n,            # player recent window
-            recent_pct=nhl_recent_pct,
-            filter_teams=nhl_todays if nhl_filter_today else None,
-            nhlteamgames_df=nhlteamgames_df,  # needed for opponent stats
-            player_type=player_type_choice,
-            opp_recent_n=opp_recent_n,        # opponent window
-            b2b_map=nhl_b2b_map,
-            inj_status_map=inj_status_map
-        )
-
-        # --- Merge ALL + Recent (player stats only) ---
-        key_cols = ["Player","Pos","Team","Gms","Opp","B2B","Status"]
-        nhl_out = nhl_all  # analyze_nhl_players already returns ALL + recent
-
         if nhl_out.empty:
             st.warning("No NHL players matched the criteria.")
         else:
 
-            # Base + opponent columns
-            base_cols = ["Player","Pos","Team","Gms","Opp","B2B","Status"]
-            if player_type_choice == "Skaters":
-                opp_cols = ["GA_A","GA_R","SA_A","SA_R"]
-            else:
-                opp_cols = ["GF_A","GF_R","SF_A","SF_R"]
-
-            # Interleave player stats (ALL + recent)
-            ordered_cols = base_cols + opp_cols
-            for stat in nhl_stats_selected:
-                all_col = f"{stat}@{int(nhl_recent_pct*100)}"
-                if all_col in nhl_out.columns:
-                    ordered_cols.append(all_col)
-                if nhl_recent_n:
-                    recent_col = f"L{nhl_recent_n}{stat}@{int(nhl_recent_pct*100)}"
-                    if recent_col in nhl_out.columns:
-                        ordered_cols.append(recent_col)
-
-            nhl_out = nhl_out[[c for c in ordered_cols if c in nhl_out.columns]]
-
             # Column pinning
             col_config = {
                 "Player": st.column_config.Column(pinned="left"),
@@ -1080,11 +923,13 @@ elif sport_choice == "NHL":
 ############################################################
 if sport_choice == "Tennis":
 
+    from tennis.helpers import tennis_data_version, tennis_slate_version, tennis_hit_rate_table
+
     # WTA / ATP selection
     tour_choice = st.radio("Tour", ["WTA", "ATP"])
 
-    # Load gamelogs based on tour
-    df = load_tennis_raw_data(tour=tour_choice)
+    # Data version of the tour's gamelogs (part of the Calculate cache key)
+    tennis_version = tennis_data_version(tour_choice)
 
     # Sidebar Filters
     with st.sidebar.form("Tennis Filters"):
@@ -1094,31 +939,33 @@ if sport_choice == "Tennis":
             "Select Stats", stats_available, default=["GW","GL","GD","TG","MW"]
         )
 
-        percentages = [st.slider("Hit Rate %", 40, 100, 80, 5)]
+        percentages = sorted(st.multiselect(
+            "Hit Rate %", list(range(40, 101, 5)), default=[80]
+        )) or [80]
+
+        player_windows = st.multiselect(
+            "Player Performance Windows", ["L5", "L10"], default=["L5"],
+            help="All-games columns are always shown"
+        )
+        recent_n = [5 if w == "L5" else 10 for w in ["L5", "L10"] if w in player_windows]
 
-        player_window = st.radio("Player Performance Window", ["L5", "L10", "ALL"], index=0)
-        recent_n = 5 if player_window == "L5" else 10 if player_window == "L10" else None
+        players_with_match = st.checkbox("Players With A Match Soon", value=True)
 
         calculate = st.form_submit_button("Calculate")
 
     # --- Calculate ---
     if calculate:
 
-        # Trim to most recent 82 games per player
-        df_calc = trim_df_to_recent_82(df)
-
-        # Compute surface-aware percentiles
-        summary_df = compute_tennis_percentiles(
-            df_calc,
+        # Final table, cached per data version, schedule and form inputs
+        summary_df = tennis_hit_rate_table(
+            tour_choice,
+            tennis_version,
+            tennis_slate_version(),
             stats_selected,
             percentages,
-            recent_n=recent_n
+            recent_n,
+            players_with_match,
         )
 
-        # Sort by first stat selected
-        sort_col = f"{stats_selected[0]}@{percentages[0]}"
-        if sort_col in summary_df.columns:
-            summary_df = summary_df.sort_values(sort_col, ascending=False)
-
         # Display DataFrame with Surface included
         st.dataframe(summary_df, use_container_width=True)
@@ -1,21 +1,25 @@
 import os
+import sys
 import pandas as pd
 from datetime import datetime, timedelta
 from time import sleep
+from urllib.parse import urlparse, parse_qs
 from nba_api.stats.endpoints import leaguegamelog
 from nba_api.stats.library.http import NBAStatsHTTP
 from curl_cffi import requests as curl_requests
+from nba.nbagamelogstore import (
+    OUTPUT_CSV, STORE_DIR, append_games, compact, last_stored_date, seed_from_csv
+)
+from shared.httpcache import HttpCache, CachedSession
+from shared.manifest import record_datasets
+
+# Run from the repo root: python -m nba.getnbagamelogs [--compact]
 
 print("=== NBA PLAYER GAME LOGS START ===")
 
 # ==================================================
 # CONFIG
 # ==================================================
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-os.makedirs(DATA_DIR, exist_ok=True)
-
-OUTPUT_CSV = os.path.join(DATA_DIR, "nbaplayergamelogs.csv")
 SEASON = "2025-26"
 SEASON_START = datetime(2025, 10, 22)  # opening night
 SLEEP_TIME = 1.8   # CRITICAL (Cloudflare threshold ~35 req/min)
@@ -40,8 +44,21 @@ session.headers.update({
     "Accept-Encoding": "gzip, deflate, br"
 })
 
-NBAStatsHTTP()._session = session
-NBAStatsHTTP._session = session
+def completed_day(response):
+    # A day's log is final once it is two days old (late games post overnight)
+    query = parse_qs(urlparse(str(response.url)).query)
+    try:
+        day = datetime.strptime(query.get("DateTo", [""])[0], "%m/%d/%Y")
+    except ValueError:
+        return False
+    return day.date() < (datetime.today() - timedelta(days=1)).date()
+
+# LeagueGameLog pulls go through the shared HTTP cache
+http_cache = HttpCache()
+cached_session = CachedSession(session, http_cache, ttl=0, permanent=completed_day)
+
+NBAStatsHTTP()._session = cached_session
+NBAStatsHTTP._session = cached_session
 
 # ==================================================
 # PRIME CLOUDLFARE SESSION (CRITICAL)
@@ -58,15 +75,20 @@ except Exception as e:
 # ==================================================
 # RESUME LOGIC
 # ==================================================
-if os.path.exists(OUTPUT_CSV):
-    existing = pd.read_csv(OUTPUT_CSV, parse_dates=["GAME_DATE"])
-    last_date = existing["GAME_DATE"].max()
+seed_from_csv()
+
+# New games are appended to the combined CSV; without one, compact() below
+# builds it from the store once
+csv_exists = os.path.exists(OUTPUT_CSV)
+
+last_date = last_stored_date()
+if last_date is not None:
     start_date = last_date + timedelta(days=1)
-    all_games = [existing]
     print(f"[RESUME] Continuing from {start_date.date()}")
 else:
     start_date = SEASON_START
-    all_games = []
+
+new_rows = 0
 
 today = datetime.today()
 
@@ -78,6 +100,7 @@ current = start_date
 while current <= today:
     date_str = current.strftime("%m/%d/%Y")
     print(f"[PULL] {date_str}")
+    hits_before = http_cache.stats["hit"]
 
     try:
         gamelog = leaguegamelog.LeagueGameLog(
@@ -113,33 +136,29 @@ while current <= today:
 
             df["MIN"] = df["MIN"].apply(convert_min_to_float)
 
-            all_games.append(df)
+            # only games not already in the store are written (day file + CSV)
+            written = append_games(df, OUTPUT_CSV if csv_exists else None)
+            new_rows += written
 
-            print(f"   -> {len(df)} rows")
+            print(f"   -> {len(df)} rows ({written} new)")
 
     except Exception as e:
         print(f"   !! skipped {date_str}: {e}")
 
     current += timedelta(days=1)
-    sleep(SLEEP_TIME)
+
+    # Cache hits never reach stats.nba.com, so they need no spacing
+    if http_cache.stats["hit"] == hits_before:
+        sleep(SLEEP_TIME)
+
+print(f"\nAppended {new_rows} rows -> {STORE_DIR}" + (f" and {OUTPUT_CSV}" if csv_exists else ""))
+print(http_cache.summary())
 
 # ==================================================
-# COMBINE
+# COMPACT (on demand: --compact, or python -m nba.nbagamelogstore)
 # ==================================================
-df = pd.concat(all_games, ignore_index=True)
-
-desired_columns = [
-    "Season","player_id","player_name","TEAM_ID","TEAM_ABBREVIATION",
-    "GAME_ID","GAME_DATE","MATCHUP","WL","MIN",
-    "FGM","FGA","FG3M","FG3A","FTM","FTA",
-    "OREB","DREB","REB","AST","STL","BLK","TOV","PF",
-    "PTS","PLUS_MINUS"
-]
-
-df = df[desired_columns]
-df = df.drop_duplicates(subset=["player_id","GAME_ID"], keep="last")
-df = df.sort_values(["player_id","GAME_DATE"])
-df.to_csv(OUTPUT_CSV, index=False)
-
-print(f"\nSaved {len(df)} rows -> {OUTPUT_CSV}")
+if "--compact" in sys.argv or not csv_exists:
+    compact(OUTPUT_CSV)
+elif new_rows:
+    record_datasets(OUTPUT_CSV)
 print("=== NBA PLAYER GAME LOGS FINISHED ===")
\ No newline at end of file
@@ -1,6 +1,12 @@
 import os
 import pandas as pd
 
+from nba.helpers import split_nba_matchups, write_defense_tables
+from nba.nbagamelogstore import game_id_keys
+from shared.manifest import record_datasets
+
+# Run from the repo root: python -m nba.getnbateamtotals
+
 # ==================================================
 # CONFIG
 # ==================================================
@@ -17,28 +23,37 @@ STATS = [
 ]
 
 # ==================================================
-# LOAD PLAYER GAME LOGS
+# LOAD PLAYER GAME LOGS (games not in team totals yet)
 # ==================================================
 df = pd.read_csv(PLAYER_CSV)
-df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"])
 
-# Extract TEAM from MATCHUP
-def parse_matchup(row):
-    parts = row.split()
-    if "@" in parts:
-        return parts[0], parts[2]  # TEAM, OPP
-    else:  # "SAC vs. DET"
-        return parts[0], parts[2]
+if os.path.exists(TEAM_CSV):
+    done_ids = set(game_id_keys(pd.read_csv(TEAM_CSV, usecols=["GAME_ID"])["GAME_ID"]))
+else:
+    done_ids = set()
+
+df = df[~game_id_keys(df["GAME_ID"]).isin(done_ids)].copy()
+df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"])
 
-df[["TEAM", "OPP_TEAM"]] = df["MATCHUP"].apply(lambda x: pd.Series(parse_matchup(x)))
+# Extract TEAM / OPP_TEAM from MATCHUP
+df[["TEAM", "OPP_TEAM"]] = split_nba_matchups(df["MATCHUP"]).to_numpy()
 
 # ==================================================
-# AGGREGATE TO TEAM TOTALS
+# AGGREGATE NEW GAMES TO TEAM TOTALS
 # ==================================================
 team_totals = df.groupby(["GAME_ID", "GAME_DATE", "TEAM", "OPP_TEAM"])[STATS].sum().reset_index()
 
 # ==================================================
-# SAVE
+# APPEND
+# ==================================================
+if team_totals.empty:
+    print(f"No new games for {TEAM_CSV}")
+else:
+    team_totals.to_csv(TEAM_CSV, mode="a", header=not os.path.exists(TEAM_CSV), index=False)
+    print(f"Appended {len(team_totals)} rows ({team_totals['GAME_ID'].nunique()} games) -> {TEAM_CSV}")
+    record_datasets(TEAM_CSV)
+
+# ==================================================
+# PRECOMPUTE DEFENSE TABLES (L5 / L10 / ALL, read by the app)
 # ==================================================
-team_totals.to_csv(TEAM_CSV, index=False)
-print(f"Saved {len(team_totals)} rows -> {TEAM_CSV}")
+write_defense_tables()
@@ -2,19 +2,33 @@
 
 
 import pandas as pd
+import numpy as np
 from datetime import timedelta
 import json
+import os
 import streamlit as st
 from shared.utils import (
     get_league_today,
     get_teams_playing_on_date,
-    hit_rate_threshold,
+    hit_rate_thresholds,
+    pack_player_games,
+    cast_column_like,
+    recent_windows,
+    manifest_version,
+    file_digest,
     trim_df_to_recent_82,
     dedupe_columns,
     strip_display_ids,
     norm_name,
 )
-from nba.nbadefense import get_team_def_ranks, get_team_def_ranks_by_position
+from shared.storage import read_table
+from shared.injurystatus import read_status_ids, status_ids_path
+from shared.hitratecube import write_cube, load_hit_rate_cube, cube_lookup
+from nba.nbadefense import (
+    update_defense_store,
+    store_def_ranks,
+    DEF_STORE_DIR,
+)
 
 DEF_STAT_MAP = {
     "PTS": ("PaA", "PaR"),
@@ -34,22 +48,36 @@ DEF_STAT_MAP = {
     "DREB": ("DRaA", "DRaR"),
 }
 
-@st.cache_data(ttl=3600)
-def load_nba_schedule(path="nba/data/nbaschedule.json"):
+# Cached until the version argument changes (nba_slate_version(): the
+# league date and the manifest entries of the schedule / injury files)
+@st.cache_data(max_entries=2)
+def load_nba_schedule(path="nba/data/nbaschedule.json", slate_version=None):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-@st.cache_data(ttl=3600)
-def load_today_matchups(path="nba/data/nbaschedule.json"):
+@st.cache_data(max_entries=2)
+def load_today_matchups(path="nba/data/nbaschedule.json", slate_version=None):
     return load_todays_schedule(path)
 
-@st.cache_data(ttl=300)
-def load_nba_injury_status():
+# One dict shared by every session (read it, do not modify it)
+@st.cache_resource(max_entries=2)
+def load_nba_injury_status(slate_version=None):
+    """
+    {player_id (str): Status_norm} from the file nbainjuries.py writes.
+    Raises OSError when there is no injury report.
+    """
+    return read_status_ids(NBA_STATUS_CSV)
+
+def nba_injury_status(slate_version=None):
+    """
+    (status map, None), or (None, error message) when the injury report
+    cannot be read. Not cached itself, so a failed read is retried on the
+    next run; the caller shows the message.
+    """
     try:
-        df = pd.read_csv("nba/data/nbaplayerstatus.csv", dtype={"player_id": str})
-        return dict(zip(df["player_id"], df["Status_norm"]))
-    except Exception:
-        return {}
+        return load_nba_injury_status(slate_version), None
+    except Exception as e:
+        return None, f"Unable to load NBA injuries: {e}"
 
 def parse_nba_matchup(matchup):
     """
@@ -65,6 +93,22 @@ def parse_nba_matchup(matchup):
     opp = parts[2].strip().upper()
     return team, opp
 
+NBA_MATCHUP_PATTERN = r"^\s*(?P<Team>[A-Z]{3})\s+(?:@|vs\.?)\s+(?P<Opp>[A-Z]{3})"
+
+def split_nba_matchups(matchup):
+    """
+    Vectorized parse_nba_matchup: a Team / Opp frame for a MATCHUP
+    Series. Categorical input (see shared.storage) is parsed once per
+    category. Unparseable values give NaN.
+    """
+    if isinstance(matchup.dtype, pd.CategoricalDtype):
+        parts = split_nba_matchups(pd.Series(matchup.cat.categories))
+        parts = parts.reindex(matchup.cat.codes.to_numpy())  # code -1 (NaN) -> NaN
+        parts.index = matchup.index
+        return parts
+
+    return matchup.astype(str).str.extract(NBA_MATCHUP_PATTERN)
+
 def add_team_opponent_columns(df):
     """
     Extract Team and Opp from MATCHUP.
@@ -76,16 +120,116 @@ def add_team_opponent_columns(df):
     if "MATCHUP" not in df.columns:
         raise ValueError("MATCHUP column not found")
 
-    matchup = df["MATCHUP"].astype(str)
+    parts = split_nba_matchups(df["MATCHUP"])
+    df["Team"] = parts["Team"]
+    df["Opp"] = parts["Opp"]
+
+    return df
+
+NBA_MAX_GAMES = 82
 
-    df["Team"] = matchup.str.slice(0, 3)
+NBA_TENSOR_STATS = [
+    "PTS", "REB", "AST", "FGM", "FGA",
+    "FG3M", "FG3A", "FTM", "FTA",
+    "BLK", "STL", "TOV", "OREB", "DREB",
+    "PRA", "PR", "PA", "RA",
+]
+
+def build_nba_game_tensor(df, stats=NBA_TENSOR_STATS):
+    """
+    Pack NBA player logs into a columnar "player x game" store.
+
+    Returns a dict with:
+      player_id : array of player ids (tensor row order)
+      stats     : stat names along the last tensor axis
+      values    : float array [players, 82, stats], most recent game first,
+                  NaN-padded past each player's last game
+      lengths   : number of valid games per player
+      dtypes    : source dtype per stat (ints stay ints on output)
+      info      : per-player frame (player_name, Team, PosBucket, Pos)
+                  taken from the most recent game
+
+    L5 / L10 / ALL windows are then plain slices: values[:, :5], values[:, :10], values.
+    """
+    df = df.copy()
+    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"], errors="coerce")
+    stats = [s for s in stats if s in df.columns]
 
-    df["Opp"] = matchup.str.extract(
-        r"(?:@|vs.)\s+([A-Z]{3})",
-        expand=False
+    recent_df = df.sort_values("GAME_DATE", ascending=False, kind="stable")
+    keys, values, lengths = pack_player_games(
+        recent_df, "player_id", stats, max_games=NBA_MAX_GAMES
     )
 
-    return df
+    info = (
+        recent_df.drop_duplicates("player_id")
+                 .set_index("player_id")
+                 .loc[keys, ["player_name", "Team", "PosBucket", "Pos"]]
+                 .reset_index()
+    )
+
+    return {
+        "player_id": np.array(keys, dtype=object),
+        "stats": stats,
+        "values": values,
+        "lengths": lengths,
+        "dtypes": {s: df[s].dtype for s in stats},
+        "info": info,
+    }
+
+def index_positional_defense(pos_def_df):
+    """
+    Positional defense table keyed by (Opp, PosBucket, STAT), keeping the
+    first row per key. Already-indexed tables are returned unchanged.
+    """
+    keys = ["Opp", "PosBucket", "STAT"]
+    if list(pos_def_df.index.names) == keys:
+        return pos_def_df
+
+    indexed = pos_def_df.set_index(keys)
+    return indexed[~indexed.index.duplicated(keep="first")]
+
+def attach_defense_columns(summary_df, pos_buckets, stats, opponent_def, pos_def_df=None):
+    """
+    Add <stat> AVG_ALLOWED / RANK columns for each player's opponent.
+
+    Overall ranks come from opponent_def (indexed by team); when pos_def_df
+    is given, a matching (Opp, PosBucket, STAT) row overrides them. Players
+    without an opponent in opponent_def get NaN.
+    """
+    def_stats = [s for s in stats if s in DEF_STAT_MAP]
+    if opponent_def is None or not def_stats:
+        return summary_df
+
+    opp = summary_df["Opp"]
+    has_def = opp.isin(opponent_def.index).to_numpy()
+    if not has_def.any():
+        return summary_df
+
+    def_cols = [col for s in def_stats for col in DEF_STAT_MAP[s]]
+    defense = opponent_def[def_cols].reindex(opp.to_numpy())
+
+    if pos_def_df is not None:
+        pos_def = index_positional_defense(pos_def_df)
+        for stat in def_stats:
+            avg_col, rank_col = DEF_STAT_MAP[stat]
+            keys = pd.MultiIndex.from_arrays([opp.to_numpy(), pos_buckets, [stat] * len(opp)])
+            found = keys.isin(pos_def.index) & has_def
+            if found.any():
+                hits = pos_def.reindex(keys[found])
+                defense.iloc[found, defense.columns.get_loc(avg_col)] = hits["AVG_ALLOWED"].to_numpy()
+                defense.iloc[found, defense.columns.get_loc(rank_col)] = hits["RANK"].to_numpy()
+
+    for stat in def_stats:
+        avg_col, rank_col = DEF_STAT_MAP[stat]
+        avg = defense[avg_col].to_numpy(dtype=float)
+        rank = np.trunc(defense[rank_col].to_numpy(dtype=float))
+        avg[~has_def] = np.nan
+        rank[~has_def] = np.nan
+
+        summary_df[avg_col] = np.round(avg, 1)
+        summary_df[rank_col] = rank.astype(int) if has_def.all() else rank
+
+    return summary_df
 
 def compute_player_percentiles(
     df,
@@ -96,89 +240,89 @@ def compute_player_percentiles(
     today_matchups,
     show_positional_def=False,
     pos_def_df=None,
+    game_tensor=None,
+    hit_rate_cube=None,
 ):
-    df = df.copy()
-    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"], errors="coerce")
-
-    results = []
-
-    for pid, group in df.groupby("player_id", sort=False):
-
-        group = group.sort_values("GAME_DATE", ascending=False).head(82)
-        if group.empty:
-            continue
+    """
+    Hit rate table for every player in df.
 
-        player_name = group["player_name"].iloc[0]
-        team = group["Team"].iloc[0]
-        pos_bucket = group["PosBucket"].iloc[0]
-        pos_display = group["Pos"].iloc[0]
+    game_tensor is the prebuilt store from load_nba_game_tensor(); when it
+    is missing (or lacks a requested stat) one is built from df. df then
+    only selects which players are reported, in df order.
 
-        row = {
-            "player_id": pid,
-            "Player": player_name,
-            "Team": team,
-            "Pos": pos_display,
-            "Gms": len(group),
-        }
+    hit_rate_cube (load_nba_hit_rate_cube()) turns thresholds it covers
+    into lookups; anything else is computed from the tensor.
 
+    percentages and recent_n may both be lists (e.g. [60, 70, 80, 90] and
+    [5, 10]): every combination comes from the same per-player arrays, as
+    {stat}@{pct} (ALL) and L{n}{stat}@{pct} columns.
+    """
+    if game_tensor is None or not set(stats) <= set(game_tensor["stats"]):
+        game_tensor = build_nba_game_tensor(df, stats)
+
+    player_idx = {pid: i for i, pid in enumerate(game_tensor["player_id"])}
+    pids = [pid for pid in df["player_id"].unique() if pid in player_idx]
+    idx = np.array([player_idx[pid] for pid in pids], dtype=int)
+
+    info = game_tensor["info"].iloc[idx]
+    values = game_tensor["values"][idx]
+    lengths = game_tensor["lengths"][idx]
+    stat_pos = {s: j for j, s in enumerate(game_tensor["stats"])}
+
+    teams = info["Team"].to_numpy()
+
+    summary_df = pd.DataFrame({
+        "player_id": pids,
+        "Player": info["player_name"].to_numpy(),
+        "Team": teams,
+        "Pos": info["Pos"].to_numpy(),
+        "Gms": lengths,
         # ===== TODAY'S OPPONENT =====
-        opp = today_matchups.get(team)
-        row["Opp"] = opp
-
-        # ===== DEFENSIVE MATCHUPS =====
-        if opp and opponent_def is not None and opp in opponent_def.index:
-
-            for stat in stats:
-                if stat not in DEF_STAT_MAP:
-                    continue
-
-                avg_col, rank_col = DEF_STAT_MAP[stat]
-
-                avg_val = opponent_def.loc[opp, avg_col]
-                rank_val = opponent_def.loc[opp, rank_col]
-
-                if (
-                    show_positional_def
-                    and pos_def_df is not None
-                ):
-                    pos_row = pos_def_df[
-                        (pos_def_df["Opp"] == opp)
-                        & (pos_def_df["PosBucket"] == pos_bucket)
-                        & (pos_def_df["STAT"] == stat)
-                    ]
-
-                    if not pos_row.empty:
-                        avg_val = pos_row["AVG_ALLOWED"].iloc[0]
-                        rank_val = pos_row["RANK"].iloc[0]
+        "Opp": pd.Series([today_matchups.get(team) for team in teams], dtype=object),
+    })
 
-                row[avg_col] = round(avg_val, 1)
-                row[rank_col] = int(rank_val)
+    # ===== DEFENSIVE MATCHUPS =====
+    summary_df = attach_defense_columns(
+        summary_df,
+        info["PosBucket"].to_numpy(),
+        stats,
+        opponent_def,
+        pos_def_df if show_positional_def else None,
+    )
 
-        # ===== PLAYER HIT RATE PERCENTILES =====
-        for stat in stats:
+    # ===== PLAYER HIT RATE PERCENTILES (cube lookup or tensor slices) =====
+    windows = recent_windows(recent_n)
 
-            vals_all = pd.to_numeric(group[stat], errors="coerce").dropna()
+    def window_thresholds(stat, window):
+        thr = cube_lookup(hit_rate_cube, pids, stat, percentages, window)
+        if thr is None:
+            thr = hit_rate_thresholds(values[:, :window, stat_pos[stat]], percentages)
+        return thr
 
-            if vals_all.empty:
-                continue
+    for stat in stats:
+        dtype = game_tensor["dtypes"][stat]
 
-            vals_recent = (
-                pd.to_numeric(group.head(recent_n)[stat], errors="coerce").dropna()
-                if recent_n
-                else None
-            )
+        thr_all = window_thresholds(stat, None)
+        no_games = np.isnan(thr_all)
+        if no_games.all():
+            continue
 
-            for pct in percentages:
-                row[f"{stat}@{int(pct)}"] = hit_rate_threshold(vals_all, pct)
+        thr_recent = {}
+        for window in windows:
+            # An empty recent window still scores 0, as hit_rate_threshold does
+            thr = np.nan_to_num(window_thresholds(stat, window), nan=0)
+            thr[no_games] = np.nan
+            thr_recent[window] = thr
 
-                if recent_n and vals_recent is not None:
-                    row[f"L{recent_n}{stat}@{int(pct)}"] = hit_rate_threshold(
-                        vals_recent, pct
-                    )
+        for k, pct in enumerate(percentages):
+            summary_df[f"{stat}@{int(pct)}"] = cast_column_like(thr_all[:, k], dtype)
 
-        results.append(row)
+            for window, thr in thr_recent.items():
+                summary_df[f"L{window}{stat}@{int(pct)}"] = cast_column_like(
+                    thr[:, k], dtype
+                )
 
-    return pd.DataFrame(results)
+    return summary_df
 
 def load_todays_schedule(schedule_path="nba/data/nbaschedule.json"):
     try:
@@ -311,12 +455,27 @@ def add_combo_stats(df):
 
     return df
 
-@st.cache_data(ttl=3600)
-def load_nba_raw_data():
+NBA_POSITIONS_CSV = "nba/data/nbaplayerspositions.csv"
+
+NBA_DATA_FILES = (
+    "nba/data/nbaplayergamelogs.csv",
+    "nba/data/nbateamgametotals.csv",
+    NBA_POSITIONS_CSV,
+)
+
+def nba_data_version():
+    """
+    Version stamp of the NBA CSVs (their manifest entries), used as a
+    cache key so derived structures are rebuilt once per data refresh.
+    """
+    return manifest_version(*NBA_DATA_FILES)
+
+@st.cache_data(max_entries=2)
+def load_nba_raw_data(data_version=None):
     # --- Load raw CSVs ---
-    player_logs_df = pd.read_csv("nba/data/nbaplayergamelogs.csv")
-    team_totals_df = pd.read_csv("nba/data/nbateamgametotals.csv")
-    pos_df = pd.read_csv("nba/data/nbaplayerspositions.csv")
+    player_logs_df = read_table("nba/data/nbaplayergamelogs.csv")
+    team_totals_df = read_table("nba/data/nbateamgametotals.csv")
+    pos_df = read_table(NBA_POSITIONS_CSV)
 
     # --- Normalize IDs on RAW dataframes ---
     player_logs_df["player_id"] = player_logs_df.get(
@@ -355,12 +514,27 @@ def load_nba_raw_data():
 
     return df, team_totals_df, pos_df
 
-@st.cache_data(ttl=3600)
-def load_defense_tables(window):
+DEF_WINDOWS = ["L5", "L10", "ALL"]
+
+def pivot_opponent_def(overall_def):
     """
-    Load raw NBA data and compute overall + positional defensive tables.
+    One row per opponent with the DEF_STAT_MAP average / rank columns,
+    the lookup compute_player_percentiles takes as opponent_def.
     """
-    player_logs_df, team_totals_df, pos_df = load_nba_raw_data()
+    wide = overall_def.pivot(index="OPP_TEAM", columns="STAT")
+
+    opponent_def = pd.DataFrame(index=wide.index.rename(None))
+    for stat, (avg_col, rank_col) in DEF_STAT_MAP.items():
+        opponent_def[avg_col] = wide[("AVG_ALLOWED", stat)]
+        opponent_def[rank_col] = wide[("RANK", stat)]
+
+    return opponent_def
+
+def build_defense_tables(data_version=None, windows=DEF_WINDOWS):
+    """
+    {window: (opponent_def, positional_def)} from the raw NBA data.
+    """
+    player_logs_df, team_totals_df, pos_df = load_nba_raw_data(data_version)
 
     # Ensure player logs have opponent column
     if "Opp" not in player_logs_df.columns:
@@ -369,8 +543,226 @@ def load_defense_tables(window):
     # Drop rows where position is unknown
     player_logs_df = player_logs_df[player_logs_df["PosBucket"].notna()]
 
-    # Compute defense tables
-    overall_def = get_team_def_ranks(team_totals_df, window)
-    positional_def = get_team_def_ranks_by_position(player_logs_df, window)
+    # Defense tables from the incremental aggregate store (only new games
+    # are folded in); positions decide PosBucket, so they key the store
+    store = update_defense_store(
+        team_totals_df, player_logs_df, source_key=file_digest(NBA_POSITIONS_CSV)
+    )
+
+    tables = {}
+    for window in windows:
+        overall_def, positional_def = store_def_ranks(store, window)
+        tables[window] = (pivot_opponent_def(overall_def), positional_def)
+    return tables
+
+def defense_table_paths(window, out_dir=DEF_STORE_DIR):
+    return (
+        os.path.join(out_dir, f"opponent_def_{window}.parquet"),
+        os.path.join(out_dir, f"positional_def_{window}.parquet"),
+    )
+
+def write_defense_tables(out_dir=DEF_STORE_DIR):
+    """
+    Precompute the defense tables for every window the sidebar offers.
+    Run after each ingest (getnbateamtotals.py does).
+    """
+    tables = build_defense_tables(nba_data_version())
+    os.makedirs(out_dir, exist_ok=True)
+
+    for window, (opponent_def, positional_def) in tables.items():
+        opp_path, pos_path = defense_table_paths(window, out_dir)
+        opponent_def.to_parquet(opp_path)
+        positional_def.to_parquet(pos_path, index=False)
+
+    meta = {
+        "windows": list(tables),
+        "sources": list(NBA_DATA_FILES),
+        "source_digest": file_digest(*NBA_DATA_FILES),
+    }
+    with open(os.path.join(out_dir, "defense_tables.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    print(f"Saved defense tables for {', '.join(tables)} -> {out_dir}")
+
+def read_defense_tables(window, out_dir=DEF_STORE_DIR):
+    """
+    Precomputed (opponent_def, positional_def) for window, or None when
+    missing or older than the NBA CSVs.
+    """
+    try:
+        with open(os.path.join(out_dir, "defense_tables.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if window not in meta["windows"] or meta["source_digest"] != file_digest(*meta["sources"]):
+            return None
+
+        opp_path, pos_path = defense_table_paths(window, out_dir)
+        return pd.read_parquet(opp_path), pd.read_parquet(pos_path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+@st.cache_data(max_entries=6)
+def load_defense_tables(window, data_version=None):
+    """
+    (opponent_def, positional_def) for window: the files precomputed at
+    ingest, or built from the raw data when they are missing or stale.
+    """
+    tables = read_defense_tables(window)
+    if tables is None:
+        tables = build_defense_tables(data_version, [window])[window]
+    return tables
+
+@st.cache_data(max_entries=1)
+def load_nba_game_tensor(data_version=None):
+    """
+    Player x game tensor for the NBA logs, built once per data version.
+    Pass nba_data_version() so a new ingest triggers a rebuild.
+    """
+    df, _, _ = load_nba_raw_data(data_version)
+    return build_nba_game_tensor(df)
+
+NBA_HIT_RATE_CUBE = "nba/data/nba_hitrates"
+
+def build_nba_hit_rate_cube(path=NBA_HIT_RATE_CUBE):
+    """
+    Precompute NBA thresholds for every stat / pct / window.
+    Run after each ingest (python -m shared.hitratecube).
+    """
+    df, _, _ = load_nba_raw_data(nba_data_version())
+    tensor = build_nba_game_tensor(df)
+    return write_cube(
+        path, tensor["player_id"], tensor["stats"], tensor["values"], NBA_DATA_FILES
+    )
+
+def load_nba_hit_rate_cube(data_version=None):
+    return load_hit_rate_cube(NBA_HIT_RATE_CUBE, data_version)
+
+# --- Calculate results ---
+NBA_SCHEDULE_JSON = "nba/data/nbaschedule.json"
+NBA_STATUS_CSV = "nba/data/nbaplayerstatus.csv"
+
+NBA_STAT_ABBREV = {
+    "PTS": "P", "REB": "R", "AST": "A", "OREB": "OR", "DREB": "DR",
+    "PRA": "PRA", "PR": "PR", "PA": "PA", "RA": "RA",
+    "BLK": "BLK", "STL": "S", "TOV": "TO",
+    "FG3M": "3PM", "FG3A": "3PA"
+}
+
+def nba_slate_version():
+    """
+    Version stamp of everything a table depends on besides the game
+    logs: the league date and the schedule / injury files.
+    """
+    return get_league_today(), manifest_version(
+        NBA_SCHEDULE_JSON, NBA_STATUS_CSV, status_ids_path(NBA_STATUS_CSV)
+    )
+
+def rename_nba_stat_column(col):
+    for stat, short in NBA_STAT_ABBREV.items():
+        if col.startswith(stat):
+            return col.replace(stat, short, 1)
+        if col.startswith("L") and stat in col:
+            return col.replace(stat, short, 1)
+    return col
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def nba_hit_rate_table(
+    data_version,
+    slate_version,
+    injury_status,
+    stats_selected,
+    percentages,
+    recent_n,
+    defense_window,
+    show_positional_def,
+    filter_today,
+):
+    """
+    The NBA Calculate table, sorted and in display order. Cached per
+    (data_version, slate_version, form inputs) and shared across
+    sessions, so a repeated query is a lookup; the least recently used
+    of the 32 entries is dropped first. Pass nba_data_version() and
+    nba_slate_version() so new data starts a fresh entry, and the map
+    from nba_injury_status() (None: everyone "A").
+    """
+    df, _, _ = load_nba_raw_data(data_version)
+
+    # Trim to most recent 82 games per player
+    df_calc = trim_df_to_recent_82(df)
+
+    # --- Cached Defense Tables (precomputed at ingest, by opponent) ---
+    opponent_def, pos_def_df = load_defense_tables(defense_window, data_version)
+
+    # --- Load schedule & compute B2B map ---
+    schedule_data = load_nba_schedule(NBA_SCHEDULE_JSON, slate_version)
+    todays_teams, today_matchups = load_today_matchups(NBA_SCHEDULE_JSON, slate_version)
+    team_b2b_map = compute_team_b2b_from_schedule(schedule_data)
+
+    # Filter players to today's teams if selected
+    if filter_today and todays_teams:
+        latest_team = (
+            df_calc.sort_values(["player_id", "GAME_DATE"], ascending=[True, False])
+                   .groupby("player_id")["Team"]
+                   .first()
+        )
+        eligible = latest_team[latest_team.isin(todays_teams)].index
+        df_calc = df_calc[df_calc["player_id"].isin(eligible)]
+
+    # --- Compute Hit Rate Percentiles ---
+    summary_df = compute_player_percentiles(
+        df_calc,
+        stats_selected,
+        percentages,
+        recent_n,
+        opponent_def=opponent_def,
+        today_matchups=today_matchups,
+        show_positional_def=show_positional_def,
+        pos_def_df=pos_def_df,
+        game_tensor=load_nba_game_tensor(data_version),
+        hit_rate_cube=load_nba_hit_rate_cube(data_version),
+    )
 
-    return overall_def, positional_def
+    # --- Rename stat columns for display ---
+    summary_df = summary_df.rename(columns=rename_nba_stat_column)
+
+    # --- Add B2B and injury status ---
+    summary_df["B2B"] = summary_df["Team"].map(team_b2b_map).fillna("N")
+
+    # --- NBA injury statuses, keyed on player_id ---
+    if injury_status is not None:
+        summary_df["Status"] = summary_df["player_id"].astype(str).map(injury_status).fillna("A")
+    else:
+        summary_df["Status"] = "A"
+
+    # --- Column order ---
+    base_cols = ["Player", "Pos", "Team", "Opp", "B2B", "Status", "Gms"]
+    ordered_stat_cols = []
+
+    for stat in stats_selected:
+        display_stat = NBA_STAT_ABBREV.get(stat, stat)
+        for pct in percentages:
+            pct_col = f"{display_stat}@{int(pct)}"
+            if pct_col in summary_df.columns:
+                ordered_stat_cols.append(pct_col)
+
+            for n in recent_n:
+                recent_col = f"L{n}{display_stat}@{int(pct)}"
+                if recent_col in summary_df.columns:
+                    ordered_stat_cols.append(recent_col)
+
+        if stat in DEF_STAT_MAP:
+            a_col, r_col = DEF_STAT_MAP[stat]
+            if a_col in summary_df.columns:
+                ordered_stat_cols.append(a_col)
+            if r_col in summary_df.columns:
+                ordered_stat_cols.append(r_col)
+
+    cols_ordered = [c for c in base_cols + ordered_stat_cols if c in summary_df.columns]
+    summary_df = summary_df[cols_ordered]
+
+    # --- Sort ---
+    sort_col = f"{NBA_STAT_ABBREV.get(stats_selected[0], stats_selected[0])}@{int(percentages[-1])}"
+    if sort_col in summary_df.columns:
+        summary_df = summary_df.sort_values(sort_col, ascending=False)
+
+    return summary_df
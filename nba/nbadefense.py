@@ -1,6 +1,11 @@
 # data/nba_defense.py
 
+import json
+import os
 import pandas as pd
+from shared.storage import read_table, HAVE_PARQUET
+from shared.utils import file_digest
+from nba.nbagamelogstore import game_id_keys
 
 def ensure_opp_column(df):
     """
@@ -50,49 +55,92 @@ STATS = [
     "FTM", "FTA", "OREB", "DREB"
 ]
 
+def window_games(window):
+    """
+    "L5" -> 5, "L10" -> 10, "ALL" -> None
+    """
+    return None if window == "ALL" else int(window[1:])
+
+def prepare_defense_rows(df, keys):
+    """
+    The rows that feed the rankings: keys as strings, PRA added, in game
+    order (stable, so rows from the same date keep their file order).
+    """
+    df = df.dropna(subset=keys)
+    cols = [c for c in ["GAME_ID", "GAME_DATE"] + STATS if c in df.columns]
+    out = df[keys + cols].copy()
+
+    for key in keys:
+        out[key] = out[key].astype(str)
+    out["GAME_DATE"] = pd.to_datetime(out["GAME_DATE"])
+
+    # Combo stat
+    if {"PTS","REB","AST"}.issubset(out.columns):
+        out["PRA"] = out["PTS"] + out["REB"] + out["AST"]
+
+    return out.sort_values("GAME_DATE", kind="stable")
+
+def window_rows(df, keys, n_games=None):
+    """
+    Last n_games rows per key of a game-ordered frame (all rows for None).
+    """
+    if n_games is None:
+        return df
+    return df.groupby(keys, group_keys=False, observed=True).tail(n_games)
+
+def sum_stats(df, keys):
+    """
+    Per-key sums and non-null counts of every stat in one groupby().agg.
+    """
+    return df.groupby(keys, observed=True).agg(
+        **{stat: (stat, "sum") for stat in STATS},
+        **{f"{stat}_N": (stat, "count") for stat in STATS},
+    )
+
+def rank_stats(sums, keys, rank_within=None):
+    """
+    Long table of AVG_ALLOWED and RANK (1 = fewest allowed) per key and
+    stat, from sum_stats output. rank_within ranks inside each value of
+    that key column as well as each stat.
+    """
+    sums = sums.sort_index()
+    avg = pd.DataFrame(
+        sums[STATS].to_numpy(dtype=float) / sums[[f"{stat}_N" for stat in STATS]].to_numpy(dtype=float),
+        index=sums.index,
+        columns=STATS,
+    )
+
+    out = avg.melt(var_name="STAT", value_name="AVG_ALLOWED", ignore_index=False).reset_index()
+    out = out[keys + ["AVG_ALLOWED", "STAT"]]
+
+    rank_by = ["STAT"] + ([rank_within] if rank_within else [])
+    out["RANK"] = out.groupby(rank_by)["AVG_ALLOWED"].rank(method="min", ascending=True).astype(int)
+    return out
+
 def get_team_def_ranks(team_totals_df=None, window="ALL"):
     """
     Compute defensive rankings based on opponent-allowed stats from team totals.
     Expects team_totals_df with 'OPP_TEAM' or 'MATCHUP'.
     """
     if team_totals_df is None:
-        df = pd.read_csv("nba/data/nbateamgametotals.csv")
+        df = read_table("nba/data/nbateamgametotals.csv")
     else:
-        df = team_totals_df.copy()
-
-    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"])
+        df = team_totals_df.copy(deep=False)
 
     # Ensure we have an opponent column
     df, opp_col = ensure_opp_column(df)
 
-    # Combo stat
-    if {"PTS","REB","AST"}.issubset(df.columns):
-        df["PRA"] = df["PTS"] + df["REB"] + df["AST"]
-
-    # Apply window (e.g., "L5")
-    if window != "ALL":
-        n_games = int(window[1:])
-        df = df.sort_values("GAME_DATE").groupby(opp_col, group_keys=False).tail(n_games)
-
-    rows = []
-    for stat in STATS:
-        stat_df = df.groupby(opp_col)[stat].mean().reset_index(name="AVG_ALLOWED")
-        stat_df["STAT"] = stat
-        stat_df["RANK"] = stat_df["AVG_ALLOWED"].rank(method="min", ascending=True).astype(int)
-        rows.append(stat_df)
-
-    return pd.concat(rows, ignore_index=True)
+    keys = [opp_col]
+    rows = window_rows(prepare_defense_rows(df, keys), keys, window_games(window))
+    return rank_stats(sum_stats(rows, keys), keys)
 
 def get_team_def_ranks_by_position(player_logs_df, window="ALL"):
     """
     Compute defensive averages and ranks by opponent + position bucket.
     Expects player_logs_df with 'Opp' column.
     """
-    df = player_logs_df.copy()
-    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"])
-
     # Ensure we have an opponent column
-    df, opp_col = ensure_opp_column(df)
+    df, opp_col = ensure_opp_column(player_logs_df.copy(deep=False))
 
     # Required columns
     required = {opp_col, "PosBucket"}
@@ -100,22 +148,152 @@ def get_team_def_ranks_by_position(player_logs_df, window="ALL"):
     if missing:
         raise ValueError(f"Missing required columns: {missing}")
 
-    # Combo stat
-    if {"PTS","REB","AST"}.issubset(df.columns):
-        df["PRA"] = df["PTS"] + df["REB"] + df["AST"]
+    # Window per opponent + position, ranked within position bucket
+    keys = [opp_col, "PosBucket"]
+    rows = window_rows(prepare_defense_rows(df, keys), keys, window_games(window))
+    return rank_stats(sum_stats(rows, keys), keys, rank_within="PosBucket")
+
+# ==================================================
+# Incremental aggregate store
+# ==================================================
+# Rankings only need per-opponent sums and counts. ALL keeps running
+# totals; L5 / L10 are summed from a buffer of each key's last MAX_WINDOW
+# rows. update_defense_store() folds in just the games it has not seen
+# and saves the parts to DEF_STORE_DIR:
+#
+#   python -m nba.nbadefense
+
+DEF_STORE_DIR = "nba/data/nbadefense"
+MAX_WINDOW = 10
+
+# part name -> extra key next to the opponent, rank_within for rank_stats
+DEF_PARTS = {
+    "team": None,          # team totals, per opponent
+    "pos": "PosBucket",    # player logs, per opponent + position bucket
+}
+
+def fold_defense_rows(part, rows, keys):
+    """
+    Add prepared rows of new games to a part {"keys", "all", "recent"}.
+    """
+    sums = sum_stats(rows, keys)
+    recent = window_rows(rows, keys, MAX_WINDOW)
+
+    if part is not None:
+        sums = part["all"].add(sums, fill_value=0)
+        recent = pd.concat([part["recent"], recent], ignore_index=True)
+        recent = window_rows(recent.sort_values("GAME_DATE", kind="stable"), keys, MAX_WINDOW)
+
+    return {
+        "keys": keys,
+        "all": sums,
+        "recent": recent[keys + ["GAME_DATE"] + STATS].reset_index(drop=True),
+    }
+
+def load_defense_store(store_dir=DEF_STORE_DIR):
+    try:
+        with open(os.path.join(store_dir, "_meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        parts = {}
+        for name, info in meta["parts"].items():
+            keys = info["keys"]
+            parts[name] = {
+                "keys": keys,
+                "all": pd.read_parquet(os.path.join(store_dir, f"{name}_all.parquet")).set_index(keys),
+                "recent": pd.read_parquet(os.path.join(store_dir, f"{name}_recent.parquet")),
+                "games": set(info["games"]),
+            }
+    except (OSError, ValueError, KeyError):
+        return None
+
+    return {"source_key": meta.get("source_key"), "parts": parts}
+
+def save_defense_store(store, store_dir=DEF_STORE_DIR):
+    os.makedirs(store_dir, exist_ok=True)
+
+    meta = {"source_key": store["source_key"], "parts": {}}
+    for name, part in store["parts"].items():
+        part["all"].reset_index().to_parquet(os.path.join(store_dir, f"{name}_all.parquet"), index=False)
+        part["recent"].to_parquet(os.path.join(store_dir, f"{name}_recent.parquet"), index=False)
+        meta["parts"][name] = {"keys": part["keys"], "games": sorted(part["games"])}
+
+    with open(os.path.join(store_dir, "_meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+def update_defense_store(team_totals_df, player_logs_df, source_key=None, store_dir=DEF_STORE_DIR):
+    """
+    Bring the stored aggregates up to date with the logs and return them.
+
+    Only games missing from the store are aggregated. The store is rebuilt
+    from scratch when source_key changes (e.g. the player positions file,
+    which decides every row's PosBucket) or when stored games have left
+    the logs. Saving is best effort (e.g. on a read-only disk).
+    """
+    store = load_defense_store(store_dir)
+    if store is None or store["source_key"] != source_key:
+        store = {"source_key": source_key, "parts": {}}
+
+    frames = {"team": team_totals_df, "pos": player_logs_df}
+    changed = False
+
+    for name, extra_key in DEF_PARTS.items():
+        df, opp_col = ensure_opp_column(frames[name].copy(deep=False))
+        keys = [opp_col] + ([extra_key] if extra_key else [])
+
+        ids = game_id_keys(df["GAME_ID"])
+        part = store["parts"].get(name)
+        if part is not None and (part["keys"] != keys or not part["games"] <= set(ids)):
+            part = None
+
+        seen = part["games"] if part is not None else set()
+        is_new = ~ids.isin(seen)
+        if not is_new.any() and part is not None:
+            continue
+
+        part = fold_defense_rows(part, prepare_defense_rows(df[is_new.to_numpy()], keys), keys)
+        part["games"] = seen | set(ids[is_new])
+        store["parts"][name] = part
+        changed = True
+
+    if changed and HAVE_PARQUET:
+        try:
+            save_defense_store(store, store_dir)
+        except (OSError, ValueError):
+            pass
+
+    return store
+
+def store_def_ranks(store, window="ALL"):
+    """
+    (overall, positional) rank tables for window from an updated store,
+    matching get_team_def_ranks / get_team_def_ranks_by_position.
+    """
+    n_games = window_games(window)
+    if n_games is not None and n_games > MAX_WINDOW:
+        raise ValueError(f"Store keeps the last {MAX_WINDOW} games, cannot serve {window}")
+
+    tables = []
+    for name, rank_within in DEF_PARTS.items():
+        part = store["parts"][name]
+        keys = part["keys"]
 
-    # Apply window per opponent + position
-    if window != "ALL":
-        n_games = int(window[1:])
-        df = df.sort_values("GAME_DATE").groupby([opp_col, "PosBucket"], group_keys=False).tail(n_games)
+        if n_games is None:
+            sums = part["all"]
+        else:
+            sums = sum_stats(window_rows(part["recent"], keys, n_games), keys)
+        tables.append(rank_stats(sums, keys, rank_within))
 
-    rows = []
+    return tuple(tables)
 
-    for stat in STATS:
-        stat_df = df.groupby([opp_col, "PosBucket"])[stat].mean().reset_index(name="AVG_ALLOWED")
-        stat_df["STAT"] = stat
-        # Rank within position bucket
-        stat_df["RANK"] = stat_df.groupby("PosBucket")["AVG_ALLOWED"].rank(method="min", ascending=True).astype(int)
-        rows.append(stat_df)
+if __name__ == "__main__":
+    from nba.helpers import load_nba_raw_data, nba_data_version, NBA_POSITIONS_CSV
 
-    return pd.concat(rows, ignore_index=True)
+    player_logs_df, team_totals_df, _ = load_nba_raw_data(nba_data_version())
+    store = update_defense_store(
+        team_totals_df,
+        player_logs_df[player_logs_df["PosBucket"].notna()],
+        source_key=file_digest(NBA_POSITIONS_CSV),
+    )
+    for name, part in store["parts"].items():
+        print(f"[DEFENSE] {name}: {len(part['games'])} games, {len(part['all'])} keys -> {DEF_STORE_DIR}")
@@ -0,0 +1,122 @@
+import os
+import sys
+import pandas as pd
+
+from shared.manifest import record_datasets
+
+# ==================================================
+# Append-only store for NBA player game logs
+# ==================================================
+# getnbagamelogs.py writes each pulled game date to its own file in
+# data/nbagamelogs/ and records the GAME_IDs it has written in an index,
+# so a daily run only fetches and writes the new games: append_games()
+# adds them to their day files and to the end of nbaplayergamelogs.csv,
+# the file the app reads. compact() rebuilds that CSV from the day files
+# (deduped, sorted), on demand only:
+#
+#   python -m nba.nbagamelogstore
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+STORE_DIR = os.path.join(DATA_DIR, "nbagamelogs")
+INDEX_FILE = os.path.join(STORE_DIR, "ingested_game_ids.txt")
+OUTPUT_CSV = os.path.join(DATA_DIR, "nbaplayergamelogs.csv")
+
+DESIRED_COLUMNS = [
+    "Season","player_id","player_name","TEAM_ID","TEAM_ABBREVIATION",
+    "GAME_ID","GAME_DATE","MATCHUP","WL","MIN",
+    "FGM","FGA","FG3M","FG3A","FTM","FTA",
+    "OREB","DREB","REB","AST","STL","BLK","TOV","PF",
+    "PTS","PLUS_MINUS"
+]
+
+def game_id_keys(game_ids):
+    # The API returns "0022500253", the CSV round trip gives 22500253
+    return game_ids.astype(str).str.lstrip("0")
+
+def day_path(game_date):
+    return os.path.join(STORE_DIR, f"{game_date:%Y-%m-%d}.csv")
+
+def day_files():
+    if not os.path.isdir(STORE_DIR):
+        return []
+    return sorted(
+        os.path.join(STORE_DIR, name)
+        for name in os.listdir(STORE_DIR)
+        if name.endswith(".csv")
+    )
+
+def last_stored_date():
+    files = day_files()
+    if not files:
+        return None
+    return pd.Timestamp(os.path.splitext(os.path.basename(files[-1]))[0])
+
+def load_ingested_ids():
+    if not os.path.exists(INDEX_FILE):
+        return set()
+    with open(INDEX_FILE, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+def append_games(df, csv_path=None):
+    """
+    Write the rows of games not ingested yet to their day files and add
+    their GAME_IDs to the index. With csv_path, the same rows are also
+    appended to that combined CSV. Returns the number of rows written.
+    """
+    os.makedirs(STORE_DIR, exist_ok=True)
+
+    keys = game_id_keys(df["GAME_ID"])
+    new = df[~keys.isin(load_ingested_ids())][DESIRED_COLUMNS]
+    if new.empty:
+        return 0
+
+    for game_date, day in new.groupby(pd.to_datetime(new["GAME_DATE"]).dt.date):
+        path = day_path(game_date)
+        day.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+    if csv_path is not None:
+        new.to_csv(csv_path, mode="a", header=not os.path.exists(csv_path), index=False)
+
+    # Index last: an interrupted run re-writes at worst, compact() dedupes
+    with open(INDEX_FILE, "a", encoding="utf-8") as f:
+        f.writelines(f"{gid}\n" for gid in game_id_keys(new["GAME_ID"]).unique())
+
+    return len(new)
+
+def seed_from_csv(csv_path=OUTPUT_CSV):
+    """
+    One-time migration: split an existing full CSV into the store.
+    """
+    if day_files() or not os.path.exists(csv_path):
+        return 0
+
+    existing = pd.read_csv(csv_path, parse_dates=["GAME_DATE"])
+    written = append_games(existing)
+    print(f"[SEED] {written} rows from {csv_path} -> {STORE_DIR}")
+    return written
+
+def compact(output_csv=OUTPUT_CSV):
+    """
+    Rebuild the combined CSV from the day files.
+    """
+    files = day_files()
+    if not files:
+        print("[COMPACT] Store is empty, nothing to do.")
+        return None
+
+    df = pd.concat(
+        [pd.read_csv(path, parse_dates=["GAME_DATE"]) for path in files],
+        ignore_index=True
+    )
+    df = df[DESIRED_COLUMNS]
+    df = df.drop_duplicates(subset=["player_id","GAME_ID"], keep="last")
+    df = df.sort_values(["player_id","GAME_DATE"])
+    df.to_csv(output_csv, index=False)
+    record_datasets(output_csv)
+
+    print(f"[COMPACT] Saved {len(df)} rows from {len(files)} days -> {output_csv}")
+    return df
+
+if __name__ == "__main__":
+    compact(sys.argv[1] if len(sys.argv) > 1 else OUTPUT_CSV)
@@ -1,15 +1,16 @@
 # nbainjuries.py
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import time
 
 import pandas as pd
 from datetime import datetime
 import pytz
 from unidecode import unidecode
 
+from shared.espninjuries import MIN_ROWS, fetch_injury_rows
+from shared.injurystatus import write_status_ids
+
+# Run from the repo root: python -m nba.nbainjuries
+
 # ------------------------------
 # CONFIG
 # ------------------------------
@@ -35,10 +36,82 @@ def canon_name(name: str) -> str:
         .strip()
     )
 
+# ------------------------------
+# Status normalization
+# ------------------------------
+BASE_MAP = {
+    "Out": "O",
+    "Doubtful": "D",
+    "Questionable": "Q",
+    "Probable": "P",
+    "Available": "A",
+}
+
+COMMENT_TRIGGERS = {
+    "won't play": "O",
+    "out": "O",
+    "doubtful": "D",
+    "questionable": "Q",
+    "probable": "P",
+    "will play": "A",
+    "available": "A",
+}
+
+def infer_status(row):
+    base = BASE_MAP.get(row["Status_raw"], "A")
+    comment = str(row["Comment"]).lower()
+
+    for key, val in COMMENT_TRIGGERS.items():
+        if key in comment:
+            return val
+
+    if row["Status_raw"].lower() == "day-to-day":
+        return "Q"
+
+    return base
+
+def normalize_injuries(rows):
+    """
+    Player / Comment / Status_norm frame from scraped
+    Player / Status_raw / Comment rows.
+    """
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+
+    df["Status_norm"] = df.apply(infer_status, axis=1)
+    return df.drop(columns=["Status_raw"])
+
 # ------------------------------
 # Scraper
 # ------------------------------
+def fetch_nba_injuries(headless=True):
+    """
+    ESPN NBA injury report: one HTTP request parsed with lxml, and
+    headless Chrome only when that fails or finds too few rows.
+    """
+    start = time.perf_counter()
+    try:
+        rows = fetch_injury_rows(ESPN_URL)
+    except Exception as e:
+        print(f"HTTP fetch failed: {e}")
+        rows = []
+
+    if len(rows) >= MIN_ROWS:
+        print(f"Parsed {len(rows)} injury rows over HTTP in {time.perf_counter() - start:.2f}s")
+        return normalize_injuries(rows)
+
+    print(f"Only {len(rows)} injury rows over HTTP, falling back to Selenium...")
+    return fetch_nba_injuries_selenium(headless=headless)
+
 def fetch_nba_injuries_selenium(headless=True):
+    # Imported here: only the fallback needs a browser
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     options = Options()
     if headless:
         options.add_argument("--headless=new")
@@ -68,48 +141,7 @@ def fetch_nba_injuries_selenium(headless=True):
                     "Comment": tds[4].text.strip(),
                 })
 
-        df = pd.DataFrame(rows)
-        if df.empty:
-            return df
-
-        # ------------------------------
-        # Normalize injury status
-        # ------------------------------
-        base_map = {
-            "Out": "O",
-            "Doubtful": "D",
-            "Questionable": "Q",
-            "Probable": "P",
-            "Available": "A",
-        }
-
-        comment_triggers = {
-            "won't play": "O",
-            "out": "O",
-            "doubtful": "D",
-            "questionable": "Q",
-            "probable": "P",
-            "will play": "A",
-            "available": "A",
-        }
-
-        def infer_status(row):
-            base = base_map.get(row["Status_raw"], "A")
-            comment = str(row["Comment"]).lower()
-
-            for key, val in comment_triggers.items():
-                if key in comment:
-                    return val
-
-            if row["Status_raw"].lower() == "day-to-day":
-                return "Q"
-
-            return base
-
-        df["Status_norm"] = df.apply(infer_status, axis=1)
-        df = df.drop(columns=["Status_raw"])
-
-        return df
+        return normalize_injuries(rows)
 
     finally:
         driver.quit()
@@ -159,12 +191,14 @@ def add_player_ids(inj_df, roster_path=MASTER_ROSTER):
 if __name__ == "__main__":
     print("Fetching ESPN NBA injury report...")
 
-    df = fetch_nba_injuries_selenium(headless=True)
-    if df is None or len(df) < 5:
+    df = fetch_nba_injuries(headless=True)
+    if df is None or len(df) < MIN_ROWS:
         print("WARNING: Suspiciously small scrape. Skipping update to protect existing data.")
         raise SystemExit(0)
 
     df_final = add_player_ids(df)
     df_final.to_csv(OUTPUT_CSV, index=False)
-
     print(f"Saved {len(df_final)} injury rows to {OUTPUT_CSV}")
+
+    # {player_id: status} for the app (also records both files in the manifest)
+    write_status_ids(df_final, OUTPUT_CSV)
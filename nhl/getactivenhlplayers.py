@@ -1,10 +1,17 @@
 import requests
 import csv
+from shared.httpcache import HttpCache, CachedSession
+
+# Run from the repo root: python -m nhl.getactivenhlplayers
+ROSTER_TTL = 12 * 3600   # rosters and standings; revalidated after this
 
 def get_active_players_with_ids(filename="nhlplayers.csv"):
     """Fetch all active NHL players with team abbreviations, positions, and player IDs."""
+    http_cache = HttpCache()
+    session = CachedSession(requests.Session(), http_cache, ttl=ROSTER_TTL)
+
     teams_url = "https://api-web.nhle.com/v1/standings/now"
-    resp = requests.get(teams_url, timeout=20)
+    resp = session.get(teams_url, timeout=20)
     resp.raise_for_status()
     teams = resp.json()["standings"]
 
@@ -14,7 +21,7 @@ def get_active_players_with_ids(filename="nhlplayers.csv"):
         team_abbrev = team["teamAbbrev"]["default"]
         roster_url = f"https://api-web.nhle.com/v1/roster/{team_abbrev}/current"
         try:
-            r = requests.get(roster_url, timeout=20)
+            r = session.get(roster_url, timeout=20)
             r.raise_for_status()
             data = r.json()
 
@@ -51,6 +58,7 @@ def get_active_players_with_ids(filename="nhlplayers.csv"):
         writer.writerows(sorted_players)
 
     print("[DONE] Saved {} active players to {}".format(len(sorted_players), filename))
+    print(http_cache.summary())
 
 
 if __name__ == "__main__":
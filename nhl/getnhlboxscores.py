@@ -1,6 +1,10 @@
 from pathlib import Path
 import pandas as pd
 
+from shared.manifest import record_datasets
+
+# Run from the repo root: python -m nhl.getnhlboxscores
+
 # ==================================================
 # PATH SETUP (GitHub + Windows safe)
 # ==================================================
@@ -98,6 +102,7 @@ df_team_game["GAME_DATE"] = pd.to_datetime(df_team_game["GAME_DATE"]).dt.strftim
 # SAVE
 # ==================================================
 df_team_game.to_csv(OUTPUT_CSV, index=False)
+record_datasets(OUTPUT_CSV)
 
 print(f"[DONE] Saved {len(df_team_game)} team game rows -> {OUTPUT_CSV}")
 
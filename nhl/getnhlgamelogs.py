@@ -1,8 +1,12 @@
-import requests
+import os
 import pandas as pd
-import time
 from pathlib import Path
 from datetime import datetime, timedelta
+from shared.fetch import Fetcher
+from shared.httpcache import HttpCache
+from shared.manifest import record_datasets
+
+# Run from the repo root: python -u -m nhl.getnhlgamelogs
 
 # -------------------------------------------------
 # PATH SETUP (GitHub Actions safe)
@@ -13,38 +17,98 @@ DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 OUTPUT_CSV = DATA_DIR / "nhlplayergamelogs.csv"
 
-API_BASE = "https://api-web.nhle.com/v1/gamecenter/{}/boxscore"
-SLEEP_SECONDS = 0.25
+# NHL_API_BASE can point at a local stub server replaying recorded JSON
+API_HOST = os.environ.get("NHL_API_BASE", "https://api-web.nhle.com").rstrip("/")
+API_BASE = API_HOST + "/v1/gamecenter/{}/boxscore"
+SCHEDULE_URL = API_HOST + "/v1/schedule/{}"
+
+MAX_WORKERS = int(os.environ.get("NHL_MAX_WORKERS", 8))        # requests in flight
+REQUESTS_PER_SECOND = float(os.environ.get("NHL_RPS", 8))      # shared rate limit
 PRINT_EVERY = 25
 
+SCHEDULE_TTL = 6 * 3600   # open weeks; finished weeks are cached for good
+
+http_cache = HttpCache()
+fetcher = Fetcher(max_workers=MAX_WORKERS, rate=REQUESTS_PER_SECOND, cache=http_cache)
+
+
+def week_finished(response):
+    # Games can still be rescheduled until the whole week is in the past
+    week_days = [block.get("date") or "" for block in response.json().get("gameWeek", [])]
+    return bool(week_days) and max(week_days) < datetime.utcnow().strftime("%Y-%m-%d")
+
+
+def game_final(response):
+    return response.json().get("gameState") in ("OFF", "FINAL")
+
 # -------------------------------------------------
 # Load game IDs
 # -------------------------------------------------
+def load_schedules(dates):
+    """
+    Schedule responses keyed by request date. Each response covers a
+    whole gameWeek.
+    """
+    urls = [SCHEDULE_URL.format(date_str) for date_str in dates]
+    responses = fetcher.map_json(
+        urls, timeout=15, cache_ttl=SCHEDULE_TTL, cache_permanent=week_finished
+    )
+
+    return {
+        date_str: data
+        for date_str, (_, data) in zip(dates, responses)
+        if data
+    }
+
+
 def fetch_game_ids(start_date, end_date):
-    game_ids = set()
-    d = start_date
+    start_str = start_date.strftime("%Y-%m-%d")
+    end_str = end_date.strftime("%Y-%m-%d")
 
+    # One request per week (aligned to Mondays so cache keys repeat)
+    weeks = []
+    d = start_date - timedelta(days=start_date.weekday())
     while d <= end_date:
-        date_str = d.strftime("%Y-%m-%d")
-        try:
-            r = requests.get(
-                f"https://api-web.nhle.com/v1/schedule/{date_str}",
-                timeout=15
-            )
-            r.raise_for_status()
-            data = r.json()
-
-            for block in data.get("gameWeek", []):
+        weeks.append(d.strftime("%Y-%m-%d"))
+        d += timedelta(days=7)
+
+    game_ids = set()
+    seen_days = set()
+
+    def collect(schedules):
+        for date_str in sorted(schedules):
+            for block in schedules[date_str].get("gameWeek", []):
+                day = block.get("date")
+                if day in seen_days:
+                    continue
+                seen_days.add(day)
+
+                if day and not (start_str <= day <= end_str):
+                    continue
+
                 for g in block.get("games", []):
                     gid = g.get("id")
                     if gid:
                         game_ids.add(gid)
 
-        except Exception as e:
-            print(f"[WARN] Schedule fetch failed for {date_str}: {e}")
+    collect(load_schedules(weeks))
 
+    # Any day a week response did not cover (or a failed week) is asked for directly
+    missing = []
+    d = start_date
+    while d <= end_date:
+        date_str = d.strftime("%Y-%m-%d")
+        if date_str not in seen_days:
+            missing.append(date_str)
         d += timedelta(days=1)
-        time.sleep(0.2)
+
+    while missing:
+        schedules = load_schedules(missing[:1])
+        collect(schedules)
+        if not schedules:
+            print(f"[WARN] Schedule fetch failed for {missing[0]}")
+        seen_days.add(missing[0])
+        missing = [date_str for date_str in missing if date_str not in seen_days]
 
     return sorted(game_ids)
 
@@ -99,16 +163,6 @@ write_header = (
 # -------------------------------------------------
 # Helpers
 # -------------------------------------------------
-def fetch_boxscore(game_id):
-    try:
-        r = requests.get(API_BASE.format(game_id), timeout=10)
-        r.raise_for_status()
-        return r.json()
-    except Exception as e:
-        print(f"[WARN] Failed game {game_id}: {e}")
-        return None
-
-
 def toi_to_minutes(toi_str):
     if not toi_str or ":" not in str(toi_str):
         return 0.0
@@ -119,16 +173,19 @@ def toi_to_minutes(toi_str):
 rows = []
 
 # -------------------------------------------------
-# Main loop
+# Main loop (boxscores fetched concurrently, processed in game order)
 # -------------------------------------------------
-for i, game_id in enumerate(game_ids, 1):
+boxscores = fetcher.map_json(
+    [API_BASE.format(gid) for gid in game_ids], cache_permanent=game_final
+)
+
+for i, (game_id, (_, data)) in enumerate(zip(game_ids, boxscores), 1):
 
     total_games = len(game_ids)
 
     if i == 1 or i % PRINT_EVERY == 0:
         print(f"Processing game {i} / {total_games}...")
 
-    data = fetch_boxscore(game_id)
     if not data:
         continue
 
@@ -238,7 +295,8 @@ for i, game_id in enumerate(game_ids, 1):
         write_header = False
         rows.clear()
 
-    time.sleep(SLEEP_SECONDS)
+fetcher.close()
+print(http_cache.summary())
 
 print(f"Rows remaining to write: {len(rows)}")
 
@@ -253,6 +311,8 @@ if rows:
         index=False
     )
 
+record_datasets(OUTPUT_CSV)
+
 print(f"\n[SUCCESS] NHL player game data written to:\n{OUTPUT_CSV}")
 
 print("File exists:", OUTPUT_CSV.exists())
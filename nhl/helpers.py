@@ -1,10 +1,21 @@
 # nhl/helpers.py
 
 import pandas as pd
+import numpy as np
 import streamlit as st
 from datetime import datetime, timedelta
 import requests
-from shared.utils import hit_rate_threshold, dedupe_columns, norm_name
+from shared.utils import (
+    hit_rate_thresholds,
+    pack_player_games,
+    cast_column_like,
+    manifest_version,
+    dedupe_columns,
+    fillna_values,
+)
+from shared.storage import read_table
+from shared.injurystatus import read_status_ids, status_ids_path
+from shared.hitratecube import HIT_RATE_PCTS, write_cube, load_hit_rate_cube, cube_lookup
 
 # -------------------------------
 # Fetch NHL Injuries
@@ -76,6 +87,13 @@ def compute_nhl_b2b(teams_today, teams_yesterday, teams_tomorrow):
 # -----------------------------
 # Reactive Opponent Windows
 # -----------------------------
+# Team game columns averaged per player type, and whether a low value ranks 1st
+NHL_OPP_WINDOW_STATS = {
+    "Skaters": (["GA", "SA"], True),    # defensive: fewest allowed = rank 1
+    "Goalies": (["GF", "SF"], False),   # offensive: most scored = rank 1
+}
+
+@st.cache_data(max_entries=12)
 def compute_opponent_window_stats(nhlteamgames_df, player_type="Skaters", window_n=None):
     """
     Returns a DataFrame indexed by TEAM with averages and ranks for the opponent window.
@@ -89,55 +107,88 @@ def compute_opponent_window_stats(nhlteamgames_df, player_type="Skaters", window
     - team_def_df: DataFrame indexed by TEAM, with columns:
         Skaters → GA_A, GA_R, SA_A, SA_R
         Goalies → GF_A, GF_R, SF_A, SF_R
+
+    One sort and one groupby for all teams; cached per (data, player_type,
+    window_n) so switching the opponent window radio is a lookup.
     """
-    import pandas as pd
+    cols, ascending = NHL_OPP_WINDOW_STATS[player_type]
+
+    df = nhlteamgames_df[["TEAM"] + cols].copy()
+    df["game_date"] = pd.to_datetime(nhlteamgames_df["GAME_DATE"], errors="coerce").dt.date
+    df = df.dropna(subset=["game_date"])
+
+    # Most recent first, then the last window_n games of every team
+    df = df.sort_values("game_date", ascending=False, kind="stable")
+    if window_n:
+        df = df.groupby("TEAM", sort=False, observed=True).head(window_n)
+
+    avgs = df.groupby("TEAM", observed=True)[cols].mean()
+    ranks = avgs.rank(method="min", ascending=ascending).astype(int)
+
+    team_def_df = pd.DataFrame(index=avgs.index.astype(object))
+    for col in cols:
+        team_def_df[f"{col}_A"] = avgs[col].to_numpy()
+    for col in cols:
+        team_def_df[f"{col}_R"] = ranks[col].to_numpy()
+    team_def_df.index.name = "Team"
 
-    df = nhlteamgames_df.copy()
-    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"])
-    
-    records = []
-
-    teams = df["TEAM"].unique()
-    for team in teams:
-        if player_type == "Skaters":
-            # For skaters, opponent window is defensive → we look at GA/SA allowed by the team
-            team_games = df[df["TEAM"] == team].sort_values("GAME_DATE", ascending=False)
-            if window_n is not None:
-                team_games = team_games.head(window_n)
-            GA_A = team_games["GA"].mean()
-            SA_A = team_games["SA"].mean()
-            GA_R = team_games["GA"].rank(method="min").mean()  # optional: can rank all teams after loop
-            SA_R = team_games["SA"].rank(method="min").mean()
-            records.append({
-                "Team": team,
-                "GA_A": round(GA_A, 2),
-                "GA_R": int(GA_R),
-                "SA_A": round(SA_A, 2),
-                "SA_R": int(SA_R)
-            })
-        else:
-            # For goalies, opponent window is offensive → look at GF/SF scored by opponent
-            team_games = df[df["TEAM"] == team].sort_values("GAME_DATE", ascending=False)
-            if window_n is not None:
-                team_games = team_games.head(window_n)
-            GF_A = team_games["GF"].mean()
-            SF_A = team_games["SF"].mean()
-            GF_R = team_games["GF"].rank(method="min").mean()
-            SF_R = team_games["SF"].rank(method="min").mean()
-            records.append({
-                "Team": team,
-                "GF_A": round(GF_A, 2),
-                "GF_R": int(GF_R),
-                "SF_A": round(SF_A, 2),
-                "SF_R": int(SF_R)
-            })
-
-    team_def_df = pd.DataFrame(records).set_index("Team")
     return team_def_df
 
 # -------------------------------
 # Player Analysis (with reactive opponent window)
 # -------------------------------
+NHL_GAMELOGS_CSV = "nhl/data/nhlplayergamelogs.csv"
+
+NHL_STAT_MAPS = {
+    "Skaters": {
+        "TOI": "toi_minutes",
+        "G": "goals",
+        "A": "assists",
+        "P": "points",
+        "S": "shots",
+        "H": "hits",
+        "B": "blocks",
+        "PPP": "pp_points",
+        "FOW": "faceoffs_won"
+    },
+    "Goalies": {
+        "SA": "shots_against",
+        "GA": "goals_against",
+        "SV": "saves",
+        "SV%": "save_pct"
+    },
+}
+
+def filter_nhl_players(nhl_df, player_type):
+    """
+    Clean the raw game log and keep real games for the player type
+    (skaters with > 8 TOI minutes, goalies with > 40).
+    """
+    nhl_df = fillna_values(nhl_df, 0)
+    nhl_df.columns = dedupe_columns(nhl_df.columns)
+
+    # Filter by player type & TOI
+    if player_type == "Skaters":
+        return nhl_df[(nhl_df["is_goalie"] == False) & (nhl_df["toi_minutes"] > 8)].copy()
+    return nhl_df[(nhl_df["is_goalie"] == True) & (nhl_df["toi_minutes"] > 40)].copy()
+
+def nhl_data_version():
+    """
+    Version stamp of the NHL game log, used as a cache key.
+    """
+    return manifest_version(NHL_GAMELOGS_CSV)
+
+@st.cache_resource(max_entries=1)
+def load_nhl_raw_data(data_version=None):
+    """
+    Typed NHL game log split by player type: {"Skaters": df, "Goalies": df},
+    each already through filter_nhl_players. Rebuilt when data_version
+    (nhl_data_version()) changes and shared across sessions without
+    copying, so callers must not modify the frames.
+    """
+    nhl_df = read_table(NHL_GAMELOGS_CSV)
+    return {player_type: filter_nhl_players(nhl_df, player_type) for player_type in NHL_STAT_MAPS}
+
 def analyze_nhl_players(
     nhl_df,
     nhl_stats_selected,
@@ -149,7 +200,9 @@ def analyze_nhl_players(
     b2b_map=None,
     inj_status_map=None,
     nhlteamgames_df=None,   # dataframe with every team/game row
-    opp_recent_n=None       # number of recent games for opponent window
+    opp_recent_n=None,      # number of recent games for opponent window
+    hit_rate_cube=None,     # optional precomputed cube (load_nhl_hit_rate_cube)
+    prefiltered=False       # nhl_df is already load_nhl_raw_data()[player_type]
 ):
     """
     Main analysis engine for NHL players with dynamic opponent window.
@@ -157,125 +210,229 @@ def analyze_nhl_players(
     nhl_df: raw uploaded CSV
     nhl_stats_selected: list of stats user selected
     stat_map: {"Display": "csv_column"}
-    recent_n: player performance window (L5/L10/ALL)
-    recent_pct: decimal pct (0-1)
+    recent_n: player performance window (5/10/None = ALL), or a list of them
+    recent_pct: decimal pct (0-1), or a list of them
     filter_teams: optional set of team codes to filter
     player_type: "Skaters" or "Goalies"
     b2b_map: optional dict {team: B2B status}
-    inj_status_map: optional dict {norm_name(player): status}
+    inj_status_map: optional dict {player_id (str): status}
     nhlteamgames_df: dataframe with each team/game row
     opp_recent_n: opponent window (L5/L10/ALL)
+    hit_rate_cube: precomputed thresholds for player_type, or None
+    prefiltered: skip cleaning / filtering nhl_df (it is read, not modified)
     """
     if player_type is None or recent_pct is None:
         raise ValueError("player_type and recent_pct must be provided by the caller.")
 
-    nhl_df = nhl_df.copy().fillna(0)
-    nhl_df.columns = dedupe_columns(nhl_df.columns)
-
-    # Filter by player type & TOI
-    if player_type == "Skaters":
-        df_players = nhl_df[(nhl_df["is_goalie"] == False) & (nhl_df["toi_minutes"] > 8)].copy()
+    df_players = nhl_df if prefiltered else filter_nhl_players(nhl_df, player_type)
+
+    # One sort: each player's games most recent first. Keyed on player_id
+    # alone, so a traded player is a single row across all their teams.
+    recent_df = df_players.sort_values(
+        ["player_id", "game_date"], ascending=[True, False], kind="stable"
+    )
+
+    # Name / team / position as of each player's latest game
+    latest = recent_df.drop_duplicates("player_id")
+    if filter_teams:
+        latest = latest[latest["team"].isin(filter_teams)]
+        recent_df = recent_df[recent_df["player_id"].isin(latest["player_id"])]
+
+    pids = latest["player_id"].to_numpy()
+    names = latest["player_name"].astype(object).to_numpy()
+    teams = latest["team"].astype(object).to_numpy()
+
+    out = pd.DataFrame({
+        "Player": names,
+        "Pos": latest["position"].astype(object).to_numpy(),
+        "Team": teams,
+        "Gms": recent_df.groupby("player_id", sort=False).size().to_numpy(),
+        "B2B": [b2b_map.get(t, "N") for t in teams] if b2b_map else "N",
+        "Status": [inj_status_map.get(str(p), "A") for p in pids] if inj_status_map else "A",
+        "Opp": "",  # Optional: can fill if you have schedule mapping
+    })
+
+    # Attach opponent stats (precomputed per team when a window is given)
+    opp_cols, _ = NHL_OPP_WINDOW_STATS[player_type]
+    opp_cols = [f"{c}_A" for c in opp_cols] + [f"{c}_R" for c in opp_cols]
+    if nhlteamgames_df is not None and opp_recent_n is not None:
+        opp_table = compute_opponent_window_stats(nhlteamgames_df, player_type, opp_recent_n)
+        opp_vals = opp_table.reindex(teams)
+        for col in opp_cols:
+            out[col] = opp_vals[col].to_numpy()
     else:
-        df_players = nhl_df[(nhl_df["is_goalie"] == True) & (nhl_df["toi_minutes"] > 40)].copy()
-
-    rows = []
-    grouped = df_players.groupby(["player_id", "player_name", "team", "position"])
+        for col in opp_cols:
+            out[col] = None
+
+    # Hit rate thresholds for every player, selected stat, pct and window
+    # in one pass, looked up from the precomputed cube when it covers the query
+    stat_cols = {stat: col for stat, col in stat_map.items() if stat in nhl_stats_selected}
+    windows = list(recent_n) if isinstance(recent_n, (list, tuple)) else [recent_n]
+    pcts = list(recent_pct) if isinstance(recent_pct, (list, tuple)) else [recent_pct]
+    percentages = [pct*100 for pct in pcts]
+
+    tensor = None
+    thresholds = {}  # window -> [players, stats, pcts]
+    for window in windows:
+        cube_thr = [
+            cube_lookup(hit_rate_cube, list(pids), col, percentages, window)
+            for col in stat_cols.values()
+        ]
+        if cube_thr and all(thr is not None for thr in cube_thr):
+            thresholds[window] = np.stack(cube_thr, axis=1)
+            continue
 
-    # Precompute opponent stats if nhlteamgames_df and opp_recent_n are provided
-    opp_stats = {}
-    if nhlteamgames_df is not None and opp_recent_n is not None:
-        nhlteamgames_df = nhlteamgames_df.copy()
-    
-        # Convert GAME_DATE to datetime, then take only the date (discard time)
-        nhlteamgames_df["game_date"] = pd.to_datetime(
-            nhlteamgames_df["GAME_DATE"], errors="coerce", infer_datetime_format=True
-        ).dt.date
-
-        # Drop rows that couldn't be parsed
-        nhlteamgames_df = nhlteamgames_df.dropna(subset=["game_date"])
-
-        teams = nhlteamgames_df["TEAM"].unique()
-        opp_avgs = {}
-
-        # Compute averages per team
-        for team in teams:
-            team_games = nhlteamgames_df[nhlteamgames_df["TEAM"] == team].sort_values(
-                "game_date", ascending=False
-            )
-            if opp_recent_n:
-                team_games = team_games.head(opp_recent_n)
-
-            if player_type == "Skaters":
-                opp_avgs[team] = {
-                    "GA_A": team_games["GA"].mean(),
-                    "SA_A": team_games["SA"].mean()
-                }
-            else:
-                opp_avgs[team] = {
-                    "GF_A": team_games["GF"].mean(),
-                    "SF_A": team_games["SF"].mean()
-                }
-
-        # Compute ranks across all teams
-        if player_type == "Skaters":
-            ga_series = pd.Series({t: v["GA_A"] for t, v in opp_avgs.items()})
-            sa_series = pd.Series({t: v["SA_A"] for t, v in opp_avgs.items()})
-            ga_rank = ga_series.rank(method="min", ascending=True).astype(int)
-            sa_rank = sa_series.rank(method="min", ascending=True).astype(int)
-            for t in teams:
-                opp_avgs[t]["GA_R"] = ga_rank[t]
-                opp_avgs[t]["SA_R"] = sa_rank[t]
-        else:
-            gf_series = pd.Series({t: v["GF_A"] for t, v in opp_avgs.items()})
-            sf_series = pd.Series({t: v["SF_A"] for t, v in opp_avgs.items()})
-            gf_rank = gf_series.rank(method="min", ascending=False).astype(int)
-            sf_rank = sf_series.rank(method="min", ascending=False).astype(int)
-            for t in teams:
-                opp_avgs[t]["GF_R"] = gf_rank[t]
-                opp_avgs[t]["SF_R"] = sf_rank[t]
+        if tensor is None:
+            # cumcount mask inside pack_player_games keeps the last N games
+            max_games = None if None in windows else max(windows)
+            _, tensor, _ = pack_player_games(recent_df, "player_id", list(stat_cols.values()), max_games=max_games)
+        thresholds[window] = hit_rate_thresholds(np.moveaxis(tensor[:, :window], 1, -1), percentages)
 
-        opp_stats = opp_avgs
+    # Attach hit rate thresholds
+    for j, (stat, col) in enumerate(stat_cols.items()):
+        for k, pct in enumerate(pcts):
+            for window in windows:
+                # Player recent form: L5/L10, no prefix for ALL
+                prefix = f"L{window}" if window else ""
+                out[f"{prefix}{stat}@{int(pct*100)}"] = cast_column_like(
+                    thresholds[window][:, j, k], df_players[col].dtype
+                )
 
-    # --- Iterate players ---
-    for (pid, name, team, pos), g in grouped:
+    return out
 
-        if filter_teams and team not in filter_teams:
-            continue
+# -------------------------------
+# Precomputed hit rate cubes
+# -------------------------------
+NHL_HIT_RATE_CUBES = {
+    "Skaters": "nhl/data/nhl_skater_hitrates",
+    "Goalies": "nhl/data/nhl_goalie_hitrates",
+}
 
-        rec = {"Player": name, "Pos": pos, "Team": team, "Gms": len(g)}
+def build_nhl_hit_rate_cubes():
+    """
+    Precompute skater and goalie thresholds for every stat / pct / window.
+    Run after each ingest (python -m shared.hitratecube).
+    """
+    nhl_df = read_table(NHL_GAMELOGS_CSV)
 
-        # B2B
-        rec["B2B"] = b2b_map.get(team, "N") if b2b_map else "N"
+    # The app passes slider / 100 * 100, so store the same float pcts
+    pcts = [(p / 100.0) * 100 for p in HIT_RATE_PCTS]
 
-        # Injury status
-        rec["Status"] = inj_status_map.get(norm_name(name), "A") if inj_status_map else "A"
+    for player_type, path in NHL_HIT_RATE_CUBES.items():
+        df_players = filter_nhl_players(nhl_df, player_type)
+        cols = list(NHL_STAT_MAPS[player_type].values())
 
-        # Opponent team
-        rec["Opp"] = ""  # Optional: can fill if you have schedule mapping
+        recent_df = df_players.sort_values(
+            ["player_id", "game_date"], ascending=[True, False], kind="stable"
+        )
+        keys, tensor, _ = pack_player_games(recent_df, "player_id", cols)
 
-        # Attach opponent stats
-        if team in opp_stats:
-            rec.update(opp_stats[team])
-        else:
-            if player_type == "Skaters":
-                rec.update({"GA_A": None, "GA_R": None, "SA_A": None, "SA_R": None})
-            else:
-                rec.update({"GF_A": None, "GF_R": None, "SF_A": None, "SF_R": None})
+        write_cube(path, keys, cols, tensor, [NHL_GAMELOGS_CSV], pcts=pcts)
 
-        # Player recent form
-        g_sorted = g.sort_values("game_date", ascending=False)
-        if recent_n is not None:
-            g_sorted = g_sorted.head(recent_n)
+def load_nhl_hit_rate_cube(player_type):
+    return load_hit_rate_cube(NHL_HIT_RATE_CUBES[player_type], nhl_data_version())
 
-        prefix = f"L{recent_n}" if recent_n else ""  # L5/L10 or "" for ALL
+# -------------------------------
+# Calculate results
+# -------------------------------
+NHL_TEAM_GAMES_CSV = "nhl/data/nhlteamgames.csv"
+NHL_STATUS_CSV = "nhl/data/nhlplayerstatus.csv"
 
-        # Compute hit rate thresholds
-        for stat, col in stat_map.items():
-            if stat not in nhl_stats_selected:
-                continue
-            col_name = f"{prefix}{stat}@{int(recent_pct*100)}" if prefix else f"{stat}@{int(recent_pct*100)}"
-            rec[col_name] = hit_rate_threshold(g_sorted[col], recent_pct*100)
+NHL_OPP_COLS = {
+    "Skaters": ["GA_A", "GA_R", "SA_A", "SA_R"],
+    "Goalies": ["GF_A", "GF_R", "SF_A", "SF_R"],
+}
 
-        rows.append(rec)
+def nhl_slate_version():
+    """
+    Version stamp of everything a table depends on besides the player
+    game log: the date and the team games / injury files.
+    """
+    return datetime.now().strftime("%Y-%m-%d"), manifest_version(
+        NHL_TEAM_GAMES_CSV, NHL_STATUS_CSV, status_ids_path(NHL_STATUS_CSV)
+    )
 
-    return pd.DataFrame(rows)
+# One dict shared by every session (read it, do not modify it)
+@st.cache_resource(max_entries=2)
+def load_nhl_injury_status(slate_version=None):
+    """
+    {player_id (str): Status_norm} from the file nhlinjuries.py writes.
+    """
+    return read_status_ids(NHL_STATUS_CSV)
+
+# ttl matches get_nhl_todays_schedule, which comes from the NHL API
+@st.cache_data(max_entries=32, ttl=900, show_spinner=False)
+def nhl_hit_rate_table(
+    data_version,
+    slate_version,
+    player_type,
+    nhl_stats_selected,
+    nhl_percents,
+    nhl_player_windows,
+    nhl_opp_window,
+    nhl_filter_today,
+):
+    """
+    The NHL Calculate table in display order (empty when no player
+    matches). Cached per (data_version, slate_version, form inputs) and
+    shared across sessions; the least recently used of the 32 entries is
+    dropped first. Pass nhl_data_version() and nhl_slate_version().
+    """
+    nhl_df = load_nhl_raw_data(data_version)[player_type]
+    stat_map = NHL_STAT_MAPS[player_type]
+
+    nhl_recent_pct = [p / 100.0 for p in nhl_percents]
+
+    # Map windows to recent_n (ALL first, as the other sections show it)
+    recent_map = {"L5": 5, "L10": 10, "ALL": None}
+    nhl_recent_n = [recent_map[w] for w in ["ALL", "L5", "L10"] if w in nhl_player_windows]
+    opp_recent_n = recent_map[nhl_opp_window]
+
+    # Today's schedule
+    today_str, _ = slate_version
+    nhl_todays, nhl_opp_map = get_nhl_todays_schedule(today_str)
+
+    # Team games (for opponent window)
+    nhlteamgames_df = read_table(NHL_TEAM_GAMES_CSV)
+
+    # B2B mapping
+    today = datetime.strptime(today_str, "%Y-%m-%d")
+    yesterday = (today - timedelta(days=1)).strftime("%Y-%m-%d")
+    tomorrow = (today + timedelta(days=1)).strftime("%Y-%m-%d")
+    nhl_b2b_map = compute_nhl_b2b(
+        get_nhl_teams_on_date(today_str),
+        get_nhl_teams_on_date(yesterday),
+        get_nhl_teams_on_date(tomorrow)
+    )
+
+    # --- Player Analysis: ALL season stats + recent windows ---
+    nhl_out = analyze_nhl_players(
+        nhl_df=nhl_df,
+        nhl_stats_selected=nhl_stats_selected,
+        stat_map=stat_map,
+        recent_n=nhl_recent_n,            # player recent windows
+        recent_pct=nhl_recent_pct,        # hit rate pcts
+        filter_teams=nhl_todays if nhl_filter_today else None,
+        nhlteamgames_df=nhlteamgames_df,  # needed for opponent stats
+        player_type=player_type,
+        opp_recent_n=opp_recent_n,        # opponent window
+        b2b_map=nhl_b2b_map,
+        inj_status_map=load_nhl_injury_status(slate_version),
+        hit_rate_cube=load_nhl_hit_rate_cube(player_type),
+        prefiltered=True
+    )
+
+    if nhl_out.empty:
+        return nhl_out
+
+    # Base + opponent columns, then player stats (ALL + recent, per pct)
+    ordered_cols = ["Player","Pos","Team","Gms","Opp","B2B","Status"] + NHL_OPP_COLS[player_type]
+    for stat in nhl_stats_selected:
+        for pct in nhl_recent_pct:
+            for n in nhl_recent_n:
+                prefix = f"L{n}" if n else ""
+                stat_col = f"{prefix}{stat}@{int(pct*100)}"
+                if stat_col in nhl_out.columns:
+                    ordered_cols.append(stat_col)
+
+    return nhl_out[[c for c in ordered_cols if c in nhl_out.columns]]
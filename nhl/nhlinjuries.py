@@ -1,21 +1,21 @@
 # nhlinjuries.py
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+import time
 
 import pandas as pd
 from datetime import datetime
 import pytz
 from unidecode import unidecode
 
+from shared.espninjuries import MIN_ROWS, fetch_injury_rows
+from shared.injurystatus import write_status_ids
+
+# Run from the repo root: python -m nhl.nhlinjuries
+
 # ------------------------------
 # CONFIG
 # ------------------------------
 MASTER_ROSTER = "nhl/data/nhlplayers.csv"
+GAMELOGS_CSV = "nhl/data/nhlplayergamelogs.csv"
 OUTPUT_CSV = "nhl/data/nhlplayerstatus.csv"
 ESPN_URL = "https://www.espn.com/nhl/injuries"
 
@@ -33,10 +33,87 @@ def canon_name(name: str) -> str:
         .strip()
     )
 
+def initial_name(name: str) -> str:
+    """
+    "Caleb Jones" and "C. Jones" (game log style) -> "c jones".
+    """
+    parts = canon_name(name).split()
+    if len(parts) < 2:
+        return " ".join(parts)
+    return f"{parts[0][0]} {parts[-1]}"
+
+# ------------------------------
+# Status normalization
+# ------------------------------
+BASE_MAP = {
+    "Out": "O",
+    "Injured Reserve": "IR",
+    "Long-Term Injured Reserve": "LTIR",
+    "Day-To-Day": "GTD",
+}
+
+COMMENT_TRIGGERS = {
+    "out": "O",
+    "will not play": "O",
+    "game-time decision": "GTD",
+    "day-to-day": "GTD",
+    "long-term injured reserve": "LTIR",
+    "ltir": "LTIR",
+}
+
+def infer_status(row):
+    base = BASE_MAP.get(row["Status_raw"], "A")
+    comment = str(row["Comment"]).lower()
+
+    for key, val in COMMENT_TRIGGERS.items():
+        if key in comment:
+            return val
+
+    return base
+
+def normalize_injuries(rows):
+    """
+    Player / Comment / Status_norm frame from scraped
+    Player / Status_raw / Comment rows.
+    """
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+
+    df["Status_norm"] = df.apply(infer_status, axis=1)
+    return df.drop(columns=["Status_raw"])
+
 # ------------------------------
-# Selenium Scraper
+# Scraper
 # ------------------------------
+def fetch_nhl_injuries(headless=True):
+    """
+    ESPN NHL injury report: one HTTP request parsed with lxml, and
+    headless Chrome only when that fails or finds too few rows.
+    """
+    start = time.perf_counter()
+    try:
+        rows = fetch_injury_rows(ESPN_URL)
+    except Exception as e:
+        print(f"HTTP fetch failed: {e}")
+        rows = []
+
+    if len(rows) >= MIN_ROWS:
+        print(f"Parsed {len(rows)} injury rows over HTTP in {time.perf_counter() - start:.2f}s")
+        return normalize_injuries(rows)
+
+    print(f"Only {len(rows)} injury rows over HTTP, falling back to Selenium...")
+    return fetch_nhl_injuries_selenium(headless=headless)
+
 def fetch_nhl_injuries_selenium(headless=True):
+    # Imported here: only the fallback needs a browser
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from webdriver_manager.chrome import ChromeDriverManager
 
     options = Options()
 
@@ -79,43 +156,7 @@ def fetch_nhl_injuries_selenium(headless=True):
                     "Comment": tds[4].text.strip(),
                 })
 
-        df = pd.DataFrame(rows)
-        if df.empty:
-            return df
-
-        # ------------------------------
-        # Normalize injury status
-        # ------------------------------
-        base_map = {
-            "Out": "O",
-            "Injured Reserve": "IR",
-            "Long-Term Injured Reserve": "LTIR",
-            "Day-To-Day": "GTD",
-        }
-
-        comment_triggers = {
-            "out": "O",
-            "will not play": "O",
-            "game-time decision": "GTD",
-            "day-to-day": "GTD",
-            "long-term injured reserve": "LTIR",
-            "ltir": "LTIR",
-        }
-
-        def infer_status(row):
-            base = base_map.get(row["Status_raw"], "A")
-            comment = str(row["Comment"]).lower()
-
-            for key, val in comment_triggers.items():
-                if key in comment:
-                    return val
-
-            return base
-
-        df["Status_norm"] = df.apply(infer_status, axis=1)
-        df = df.drop(columns=["Status_raw"])
-
-        return df
+        return normalize_injuries(rows)
 
     finally:
         driver.quit()
@@ -123,7 +164,7 @@ def fetch_nhl_injuries_selenium(headless=True):
 # ------------------------------
 # Player ID merge
 # ------------------------------
-def add_player_ids(inj_df, roster_path=MASTER_ROSTER):
+def add_player_ids(inj_df, roster_path=MASTER_ROSTER, gamelogs_path=GAMELOGS_CSV):
     roster = pd.read_csv(roster_path, dtype={"player_id": str})
 
     # NHL roster uses player_name instead of Player
@@ -136,6 +177,18 @@ def add_player_ids(inj_df, roster_path=MASTER_ROSTER):
         how="left",
     )
 
+    # Players the roster file does not list yet (call-ups, recent trades):
+    # game logs name them "C. Jones", so match on initial + last name
+    # where that names a single player
+    logs = pd.read_csv(gamelogs_path, usecols=["player_id", "player_name"], dtype={"player_id": str})
+    logs = logs.drop_duplicates("player_id")
+    logs["initial_name"] = logs["player_name"].apply(initial_name)
+    logs = logs.drop_duplicates("initial_name", keep=False)
+    log_ids = dict(zip(logs["initial_name"], logs["player_id"]))
+
+    missing = merged["player_id"].isna()
+    merged.loc[missing, "player_id"] = merged.loc[missing, "Player"].apply(initial_name).map(log_ids)
+
     merged["player_id"] = (
         merged["player_id"]
         .astype(str)
@@ -162,19 +215,21 @@ def add_player_ids(inj_df, roster_path=MASTER_ROSTER):
 def update_nhl_injuries(headless=True):
     print("Fetching NHL injuries...")
 
-    df = fetch_nhl_injuries_selenium(headless=headless)
+    df = fetch_nhl_injuries(headless=headless)
 
     # ---- SAFETY CHECK ----
     # ESPN sometimes loads page chrome but not the injury table.
     # That produces a tiny dataframe which would wipe your CSV.
-    if df is None or len(df) < 5:
+    if df is None or len(df) < MIN_ROWS:
         print("WARNING: Suspiciously small scrape. Skipping update to protect existing data.")
         return
 
     df_final = add_player_ids(df)
     df_final.to_csv(OUTPUT_CSV, index=False)
-
     print(f"Saved {len(df_final)} injury rows to {OUTPUT_CSV}")
 
+    # {player_id: status} for the app (also records both files in the manifest)
+    write_status_ids(df_final, OUTPUT_CSV)
+
 if __name__ == "__main__":
     update_nhl_injuries(headless=True)
@@ -0,0 +1,61 @@
+#shared/espninjuries.py
+
+import requests
+from lxml import html
+
+# ==================================================
+# ESPN injury report over plain HTTP
+# ==================================================
+# espn.com/<league>/injuries renders its tables on the server, one per
+# team, with the columns NAME | POS | EST. RETURN DATE | STATUS | COMMENT.
+# A GET plus lxml reads them in well under a second. The scrapers start
+# headless Chrome (Selenium) only when this fails or finds too few rows.
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# Fewer rows than this is a page that loaded without its tables
+MIN_ROWS = 5
+
+
+def cell_text(td):
+    # Whitespace collapsed, as a browser shows it
+    return " ".join(td.text_content().split())
+
+
+def parse_injury_tables(page):
+    """
+    Player / Status_raw / Comment rows from every table of an ESPN
+    injuries page (HTML text or bytes). Rows with fewer than five cells
+    (headers, notes) are skipped.
+    """
+    if not page or not page.strip():
+        return []
+
+    rows = []
+    for tr in html.fromstring(page).xpath("//table//tr[td]"):
+        tds = tr.xpath("./td")
+        if len(tds) < 5:
+            continue
+
+        rows.append({
+            "Player": cell_text(tds[0]),
+            "Status_raw": cell_text(tds[3]),
+            "Comment": cell_text(tds[4]),
+        })
+    return rows
+
+
+def fetch_injury_rows(url, session=None, timeout=10):
+    """
+    GET an ESPN injuries page and parse its tables. Raises
+    requests.RequestException on a network error or non-200 response.
+    """
+    r = (session or requests).get(url, headers=HEADERS, timeout=timeout)
+    r.raise_for_status()
+    return parse_injury_tables(r.content)
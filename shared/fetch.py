@@ -0,0 +1,132 @@
+#shared/fetch.py
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from shared.httpcache import CachedSession
+
+# Worth another try: throttling and transient server errors
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: on average `rate` acquisitions per second,
+    with bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class Fetcher:
+    """
+    Bounded-concurrency JSON fetcher over one pooled keep-alive session.
+
+    max_workers : concurrent requests in flight
+    rate        : requests per second across all workers (token bucket)
+    retries     : extra attempts for connection errors, timeouts and
+                  RETRY_STATUS responses, with exponential backoff
+    cache       : optional shared.httpcache.HttpCache; requests then take
+                  cache_ttl= / cache_permanent= and fresh entries skip
+                  the rate limiter entirely
+    """
+
+    def __init__(self, max_workers=8, rate=8.0, burst=None, retries=3, backoff=0.5, timeout=10, session=None, cache=None):
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst)
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.cache = cache
+        self.session = CachedSession(session, cache) if cache is not None else session
+
+    def _sleep_before_retry(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = self.backoff * (2 ** attempt)
+        time.sleep(delay + random.uniform(0, self.backoff))
+
+    def get(self, url, **kwargs):
+        """
+        GET with rate limiting and retries. Raises the last error once
+        the retries are used up.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        if self.cache is None:
+            kwargs.pop("cache_ttl", None)
+            kwargs.pop("cache_permanent", None)
+        else:
+            cached = self.cache.fresh(url, kwargs.get("params"), kwargs.get("cache_ttl", 0))
+            if cached is not None:
+                return cached
+
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                r = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                self._sleep_before_retry(attempt)
+                continue
+
+            if r.status_code in RETRY_STATUS and attempt < self.retries:
+                self._sleep_before_retry(attempt, r)
+                continue
+
+            r.raise_for_status()
+            return r
+
+    def get_json(self, url, **kwargs):
+        return self.get(url, **kwargs).json()
+
+    def map_json(self, urls, **kwargs):
+        """
+        Fetch every url concurrently. Yields (url, data) in input order as
+        results arrive; data is None (with a warning) when a url fails.
+        """
+        def fetch_one(url):
+            try:
+                return url, self.get_json(url, **kwargs)
+            except Exception as e:
+                print(f"[WARN] Failed {url}: {e}")
+                return url, None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            yield from pool.map(fetch_one, urls)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,134 @@
+#shared/hitratecube.py
+
+import json
+import os
+
+import numpy as np
+import streamlit as st
+
+from shared.utils import hit_rate_thresholds, file_digest, file_version
+
+# Every combination the sidebars can ask for
+HIT_RATE_PCTS = list(range(40, 101, 5))
+HIT_RATE_WINDOWS = [5, 10, None]  # L5, L10, ALL
+
+
+def build_cube(values, pcts=HIT_RATE_PCTS, windows=HIT_RATE_WINDOWS):
+    """
+    Precompute hit rate thresholds for every stat / pct / window.
+
+    values : [players, games, stats] array, most recent game first, NaN-padded
+    Returns a [players, stats, pcts, windows] float array (NaN = no games).
+    """
+    games = np.moveaxis(np.asarray(values, dtype=float), 1, -1)  # players x stats x games
+
+    return np.stack(
+        [hit_rate_thresholds(games[..., :w] if w else games, pcts) for w in windows],
+        axis=-1,
+    )
+
+
+def _jsonable(key):
+    if isinstance(key, tuple):
+        return [_jsonable(k) for k in key]
+    return key.item() if hasattr(key, "item") else key
+
+
+def write_cube(path, keys, stats, values, sources, pcts=HIT_RATE_PCTS, windows=HIT_RATE_WINDOWS):
+    """
+    Build and save a cube as <path>.npy (raw array, memory-mappable)
+    plus <path>.json (row keys, axes and a digest of the source files).
+    No build timestamp: the same source data writes byte-identical files,
+    so the scheduled rebuild only commits a cube when it changed.
+    """
+    cube = build_cube(values, pcts, windows)
+
+    # Integer-valued stats fit losslessly in float32, halving the file
+    small = cube.astype(np.float32)
+    if np.array_equal(small, cube, equal_nan=True):
+        cube = small
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.save(f"{path}.npy", cube)
+
+    meta = {
+        "keys": [_jsonable(k) for k in keys],
+        "stats": list(stats),
+        "pcts": list(pcts),
+        "windows": list(windows),
+        "sources": list(sources),
+        "source_digest": file_digest(*sources),
+    }
+    with open(f"{path}.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    print(f"Saved hit rate cube {cube.shape} -> {path}.npy")
+    return cube
+
+
+@st.cache_resource(max_entries=16)
+def _load_hit_rate_cube(path, cube_version, data_version):
+    try:
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        # Stale cube (logs changed since it was built) → caller computes instead
+        if meta["source_digest"] != file_digest(*meta["sources"]):
+            return None
+
+        values = np.load(f"{path}.npy", mmap_mode="r")
+    except (OSError, ValueError, KeyError):
+        return None
+
+    keys = [tuple(k) if isinstance(k, list) else k for k in meta["keys"]]
+
+    return {
+        "values": values,
+        "index": {k: i for i, k in enumerate(keys)},
+        "stats": meta["stats"],
+        "pcts": meta["pcts"],
+        "windows": meta["windows"],
+    }
+
+
+def load_hit_rate_cube(path, data_version=None):
+    """
+    Memory-map a cube written by write_cube, shared across sessions.
+    Returns None when the cube is missing or older than its source files.
+    """
+    return _load_hit_rate_cube(path, file_version(f"{path}.npy", f"{path}.json"), data_version)
+
+
+def cube_lookup(cube, keys, stat, percentages, window):
+    """
+    Thresholds for keys as a [len(keys), len(percentages)] array, or None
+    when the cube does not cover the query (caller falls back to computing).
+    """
+    if cube is None:
+        return None
+
+    try:
+        s = cube["stats"].index(stat)
+        w = cube["windows"].index(window)
+        p = [cube["pcts"].index(pct) for pct in percentages]
+        rows = [cube["index"][k] for k in keys]
+    except (ValueError, KeyError):
+        return None
+
+    thr = cube["values"][np.ix_(rows, [s], p, [w])]
+    return np.asarray(thr, dtype=float).reshape(len(rows), len(p))
+
+
+def build_all_cubes():
+    from nba.helpers import build_nba_hit_rate_cube
+    from nhl.helpers import build_nhl_hit_rate_cubes
+    from tennis.helpers import build_tennis_hit_rate_cube
+
+    build_nba_hit_rate_cube()
+    build_nhl_hit_rate_cubes()
+    for tour in ("ATP", "WTA"):
+        build_tennis_hit_rate_cube(tour)
+
+
+if __name__ == "__main__":
+    build_all_cubes()
@@ -0,0 +1,169 @@
+#shared/httpcache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+# Shared by every scraper; CI restores it between runs (see workflows)
+HTTP_CACHE_DIR = os.environ.get("BMP_HTTP_CACHE", ".http_cache")
+
+_DEFAULT = object()
+
+
+class CachedResponse:
+    """
+    The parts of a requests / curl_cffi response the scrapers use,
+    served from the cache.
+    """
+
+    def __init__(self, url, status_code, text, headers):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+        self.from_cache = True
+
+    @property
+    def content(self):
+        return self.text.encode("utf-8")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        pass
+
+
+class HttpCache:
+    """
+    On-disk cache of successful GET responses, one JSON file per URL.
+
+    Each lookup passes a policy:
+      ttl       : seconds a stored response is served without contacting
+                  the server (None = forever, 0 = always revalidate)
+      permanent : callable(response) -> bool; True stores the response
+                  as final (e.g. the boxscore of a finished game)
+
+    Stale entries are revalidated with If-None-Match / If-Modified-Since,
+    so an unchanged resource costs a 304 instead of a full download.
+    stats counts hit / revalidated / miss / stored per run.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.stats = Counter()
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url, params=None):
+        if params:
+            url = f"{url}?{urlencode(sorted(dict(params).items()))}"
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _count(self, what):
+        with self.lock:
+            self.stats[what] += 1
+
+    def _load(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, path, entry):
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def _is_fresh(self, entry, ttl):
+        return entry["permanent"] or ttl is None or time.time() - entry["fetched"] < ttl
+
+    def fresh(self, url, params=None, ttl=0):
+        """
+        The stored response if it can be served without a request, else None.
+        """
+        entry = self._load(self._path(url, params))
+        if entry is None or not self._is_fresh(entry, ttl):
+            return None
+        self._count("hit")
+        return CachedResponse(entry["url"], 200, entry["text"], entry["headers"])
+
+    def get(self, session, url, params=None, ttl=0, permanent=None, **kwargs):
+        path = self._path(url, params)
+        entry = self._load(path)
+
+        if entry is not None:
+            if self._is_fresh(entry, ttl):
+                self._count("hit")
+                return CachedResponse(entry["url"], 200, entry["text"], entry["headers"])
+
+            # Stale: ask the server whether it changed
+            headers = dict(kwargs.pop("headers", None) or {})
+            if entry["headers"].get("ETag"):
+                headers["If-None-Match"] = entry["headers"]["ETag"]
+            if entry["headers"].get("Last-Modified"):
+                headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+            kwargs["headers"] = headers
+
+        r = session.get(url, params=params, **kwargs)
+
+        if r.status_code == 304 and entry is not None:
+            self._count("revalidated")
+            entry["fetched"] = time.time()
+            self._save(path, entry)
+            return CachedResponse(entry["url"], 200, entry["text"], entry["headers"])
+
+        self._count("miss")
+        if r.status_code != 200:
+            return r
+
+        entry = {
+            "url": str(r.url),
+            "text": r.text,
+            "headers": {
+                k: r.headers[k] for k in ("ETag", "Last-Modified", "Content-Type") if k in r.headers
+            },
+            "fetched": time.time(),
+            "permanent": bool(permanent and permanent(r)),
+        }
+        self._save(path, entry)
+        self._count("stored")
+        return r
+
+    def summary(self):
+        s = self.stats
+        return (
+            f"HTTP cache: {s['hit']} hits, {s['revalidated']} revalidated, "
+            f"{s['miss']} misses, {s['stored']} stored"
+        )
+
+
+class CachedSession:
+    """
+    Wraps a session so .get() goes through an HttpCache. ttl / permanent
+    are the defaults; pass cache_ttl= / cache_permanent= to override per
+    call. Everything else is forwarded to the wrapped session.
+    """
+
+    def __init__(self, session, cache=None, ttl=0, permanent=None):
+        self.session = session
+        self.cache = cache if cache is not None else HttpCache()
+        self.ttl = ttl
+        self.permanent = permanent
+
+    def get(self, url, params=None, cache_ttl=_DEFAULT, cache_permanent=_DEFAULT, **kwargs):
+        return self.cache.get(
+            self.session, url, params=params,
+            ttl=self.ttl if cache_ttl is _DEFAULT else cache_ttl,
+            permanent=self.permanent if cache_permanent is _DEFAULT else cache_permanent,
+            **kwargs
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
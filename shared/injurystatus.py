@@ -0,0 +1,94 @@
+#shared/injurystatus.py
+
+import csv
+import json
+import os
+import sys
+
+from shared.manifest import record_datasets
+
+# ==================================================
+# Compact injury status files
+# ==================================================
+# The injury scrapers write the full report (player_id, Player,
+# Status_norm, Comment, Last_Updated) to a CSV for people, and next to it
+# a {player_id: Status_norm} JSON for the app, so the app never parses the
+# report or matches names. Standard library only, like shared.manifest.
+#
+#   python -m shared.injurystatus nba/data/nbaplayerstatus.csv   (rebuild from a report)
+
+
+def status_ids_path(report_csv):
+    """
+    nba/data/nbaplayerstatus.csv -> nba/data/nbaplayerstatus.json
+    """
+    return os.path.splitext(report_csv)[0] + ".json"
+
+
+def clean_player_id(value):
+    """
+    "8475852", 8475852, "8475852.0" -> "8475852"; blank / NaN -> "".
+    """
+    pid = str(value).strip()
+    if pid.lower() in ("", "nan", "none"):
+        return ""
+    if pid.endswith(".0"):
+        pid = pid[:-2]
+    return pid
+
+
+def status_by_id(rows):
+    """
+    {player_id: Status_norm} from report rows (dicts or tuples of
+    (player_id, Status_norm)); rows without a player_id are skipped.
+    """
+    status = {}
+    for row in rows:
+        pid, value = (row["player_id"], row["Status_norm"]) if isinstance(row, dict) else row
+        pid = clean_player_id(pid)
+        if pid and isinstance(value, str) and value:
+            status[pid] = value
+    return status
+
+
+def write_status_ids(report_df, report_csv):
+    """
+    Write the compact status file for a report the scraper just saved to
+    report_csv, and record both in the data manifest.
+    """
+    path = status_ids_path(report_csv)
+    status = status_by_id(zip(report_df["player_id"], report_df["Status_norm"]))
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(status, f, sort_keys=True, separators=(",", ":"))
+        f.write("\n")
+    record_datasets(report_csv, path)
+
+    print(f"Saved {len(status)} player statuses to {path}")
+    return status
+
+
+def read_status_ids(report_csv):
+    """
+    {player_id (str): Status_norm} for a report, from its compact file,
+    or from the report itself when the compact file was never written.
+    Raises OSError when neither exists.
+    """
+    try:
+        with open(status_ids_path(report_csv), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    with open(report_csv, "r", encoding="utf-8", newline="") as f:
+        return status_by_id(csv.DictReader(f))
+
+
+if __name__ == "__main__":
+    for report in sys.argv[1:]:
+        with open(report, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        write_status_ids(
+            {"player_id": [r["player_id"] for r in rows], "Status_norm": [r["Status_norm"] for r in rows]},
+            report,
+        )
@@ -0,0 +1,131 @@
+#shared/manifest.py
+
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+
+# ==================================================
+# Data manifests
+# ==================================================
+# Every ingest script calls record_datasets() on the files it wrote. Each
+# data directory keeps a manifest.json next to its files:
+#
+#   {"nba/data/nbaplayergamelogs.csv": {"digest": ..., "rows": ..., "bytes": ..., "updated": ...}}
+#
+# The app keys its caches on the manifest entries (shared.utils.manifest_version),
+# so a cached table lives until an ingest changes the content, not for a
+# fixed TTL. Standard library only: the injury workflows run without
+# streamlit installed.
+#
+#   python -m shared.manifest nba/data/nbaplayerstatus.csv ...   (record by hand)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_NAME = "manifest.json"
+
+_loaded = {}  # manifest path -> ((mtime, size), entries)
+
+
+def dataset_key(path):
+    """
+    Repo-relative path with "/" separators, the same whether a script
+    passes an absolute path or the app a relative one.
+    """
+    return os.path.relpath(os.path.abspath(path), ROOT_DIR).replace(os.sep, "/")
+
+
+def manifest_path(path):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), MANIFEST_NAME)
+
+
+def read_manifest(path):
+    """
+    Entries of the manifest at path ({} when missing or unreadable),
+    re-read only when the file changes.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {}
+
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        entries = {}
+
+    _loaded[path] = (stamp, entries)
+    return entries
+
+
+def describe_dataset(path):
+    """
+    Manifest entry for one file: content hash, size and, for CSVs, the
+    number of data rows.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    rows = None
+    if path.endswith(".csv"):
+        lines = data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+        rows = max(lines - 1, 0)
+
+    return {
+        "digest": hashlib.sha1(data).hexdigest(),
+        "rows": rows,
+        "bytes": len(data),
+        "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def record_datasets(*paths):
+    """
+    Refresh the manifest entries of the given data files (call after
+    writing them). Missing files are skipped.
+    """
+    by_manifest = {}
+    for path in map(os.fspath, paths):  # str or pathlib.Path
+        if os.path.exists(path):
+            by_manifest.setdefault(manifest_path(path), []).append(path)
+
+    for mpath, files in by_manifest.items():
+        entries = dict(read_manifest(mpath))
+        for path in files:
+            entries[dataset_key(path)] = describe_dataset(path)
+
+        tmp = f"{mpath}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=1, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp, mpath)
+
+        for path in files:
+            entry = entries[dataset_key(path)]
+            print(f"[MANIFEST] {dataset_key(path)}: {entry['rows']} rows, {entry['digest'][:12]}")
+
+
+def dataset_entry(path):
+    """
+    The manifest entry for path, or None when it is not recorded or the
+    file size no longer matches (written by something that did not record).
+    """
+    entry = read_manifest(manifest_path(path)).get(dataset_key(path))
+    if entry is None:
+        return None
+    try:
+        if os.path.getsize(path) != entry["bytes"]:
+            return None
+    except OSError:
+        return None
+    return entry
+
+
+if __name__ == "__main__":
+    record_datasets(*sys.argv[1:])
@@ -0,0 +1,233 @@
+#shared/storage.py
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from shared.manifest import dataset_entry
+from shared.utils import file_digest
+
+try:
+    import pyarrow  # noqa: F401  (ships with streamlit)
+    HAVE_PARQUET = True
+except ImportError:
+    HAVE_PARQUET = False
+
+# CSVs stay the source of truth (ingest scripts and workflows write them).
+# Each one listed here gets a typed Parquet copy in <name>.parquet/, one file
+# per season, which read_table uses while it matches the CSV.
+TABLES = {
+    "nba/data/nbaplayergamelogs.csv": {
+        "date_cols": ["GAME_DATE"],
+        "categories": ["Season", "player_name", "TEAM_ABBREVIATION", "MATCHUP", "WL"],
+        "dtypes": {"player_id": str},
+        "season_start_month": 8,
+    },
+    "nba/data/nbateamgametotals.csv": {
+        "date_cols": ["GAME_DATE"],
+        "categories": ["TEAM", "OPP_TEAM"],
+        "season_start_month": 8,
+    },
+    "nba/data/nbaplayerspositions.csv": {
+        "categories": ["Position"],
+        "dtypes": {"player_id": str},
+    },
+    "nhl/data/nhlplayergamelogs.csv": {
+        "date_cols": ["game_date"],
+        "categories": ["team", "opponent", "home_away", "player_name", "position"],
+        "season_start_month": 8,
+    },
+    "nhl/data/nhlteamgames.csv": {
+        "date_cols": ["GAME_DATE"],
+        "categories": ["TEAM", "OPP_TEAM"],
+        "season_start_month": 8,
+    },
+    "tennis/data/wta_player_gamelogs.csv": {
+        "date_cols": ["game_date"],
+        "categories": ["tourney_name", "tourney_level", "round"],
+        "dtypes": {"player_id": str, "opponent": str, "surface": str},
+    },
+    "tennis/data/atp_player_gamelogs.csv": {
+        "date_cols": ["game_date"],
+        "categories": ["tourney_name", "tourney_level", "round"],
+        "dtypes": {"player_id": str, "opponent": str, "surface": str},
+    },
+    "tennis/data/tennisplayers.csv": {
+        "dtypes": {"player_id": str, "player_name": str},
+    },
+}
+
+ROW_COL = "_row"
+
+_hashed = {}  # csv path -> ((mtime_ns, size), digest) of its last hash
+
+
+def table_dir(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def season_labels(dates, season_start_month=1):
+    """
+    Season of each date as its starting year, e.g. 2025 for an NBA game in
+    March 2026 (season_start_month=8). Missing dates land in "unknown".
+    """
+    dates = pd.to_datetime(dates, errors="coerce")
+    year = dates.dt.year - (dates.dt.month < season_start_month).astype(int)
+    return year.astype("Int64").astype(str).replace("<NA>", "unknown")
+
+
+def source_digest(csv_path):
+    """
+    Content digest of a source CSV without hashing it on every read: the
+    data manifest entry when it is current (see shared.manifest), else a
+    hash remembered until the file's mtime / size change.
+    """
+    entry = dataset_entry(csv_path)
+    if entry is not None:
+        return entry["digest"]
+
+    stat = os.stat(csv_path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _hashed.get(csv_path)
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, file_digest(csv_path))
+        _hashed[csv_path] = cached
+    return cached[1]
+
+
+def csv_options(spec):
+    # Everything in a TABLES entry except the partitioning option
+    return {k: v for k, v in spec.items() if k != "season_start_month"}
+
+
+def read_csv_typed(csv_path, date_cols=(), categories=(), dtypes=None):
+    """
+    Parse a CSV into the typed frame the Parquet copy stores:
+    datetime64 dates, categorical team / player columns.
+    """
+    df = pd.read_csv(csv_path, dtype=dtypes, low_memory=False)
+
+    for col in date_cols:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+
+    for col in categories:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    return df
+
+
+def write_table(df, csv_path, date_cols=(), categories=(), dtypes=None, season_start_month=1):
+    """
+    Save df as <csv stem>.parquet/season=<year>.parquet files plus a
+    _meta.json holding the CSV digest the copy was built from.
+    """
+    out_dir = table_dir(csv_path)
+    os.makedirs(out_dir, exist_ok=True)
+
+    date_col = next((c for c in date_cols if c in df.columns), None)
+    if date_col is not None:
+        seasons = season_labels(df[date_col], season_start_month)
+    else:
+        seasons = pd.Series("all", index=df.index)
+
+    # Partitioning groups rows by season; keep the CSV order recoverable
+    codes = pd.factorize(seasons)[0]
+    ordered = bool((np.diff(codes) >= 0).all())
+    if not ordered:
+        df = df.assign(**{ROW_COL: np.arange(len(df))})
+
+    partitions = []
+    for season, part in df.groupby(seasons.to_numpy(), sort=False):
+        name = f"season={season}.parquet"
+        part.reset_index(drop=True).to_parquet(os.path.join(out_dir, name), index=False)
+        partitions.append(name)
+
+    stale = set(os.listdir(out_dir)) - set(partitions) - {"_meta.json"}
+    for name in stale:
+        os.remove(os.path.join(out_dir, name))
+
+    meta = {
+        "source": csv_path,
+        "source_digest": source_digest(csv_path),
+        "partitions": partitions,
+        "ordered": ordered,
+        "categories": [c for c in categories if c in df.columns],
+    }
+    with open(os.path.join(out_dir, "_meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    print(f"Saved {len(df)} rows in {len(partitions)} season files -> {out_dir}")
+
+
+def _read_parquet_copy(csv_path):
+    out_dir = table_dir(csv_path)
+    try:
+        with open(os.path.join(out_dir, "_meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("source_digest") != source_digest(csv_path):
+        return None
+
+    parts = [pd.read_parquet(os.path.join(out_dir, name)) for name in meta["partitions"]]
+    df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+    if not meta["ordered"]:
+        df = df.sort_values(ROW_COL, kind="stable").drop(columns=ROW_COL).reset_index(drop=True)
+
+    # Seasons can carry different category sets; concat falls back to object
+    for col in meta["categories"]:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+
+    return df
+
+
+def read_table(csv_path):
+    """
+    Load a data file listed in TABLES with its types already set.
+
+    Reads the Parquet copy when it matches the CSV; otherwise parses the
+    CSV and refreshes the copy (best effort, e.g. on a read-only disk).
+    Unlisted files are read as plain CSVs.
+    """
+    spec = TABLES.get(csv_path)
+    if spec is None:
+        return pd.read_csv(csv_path)
+
+    if HAVE_PARQUET:
+        try:
+            df = _read_parquet_copy(csv_path)
+        except (OSError, ValueError, KeyError):
+            df = None
+        if df is not None:
+            return df
+
+    df = read_csv_typed(csv_path, **csv_options(spec))
+
+    if HAVE_PARQUET:
+        try:
+            write_table(df, csv_path, **spec)
+        except (OSError, ValueError):
+            pass
+
+    return df
+
+
+def build_all_tables():
+    for csv_path, spec in TABLES.items():
+        try:
+            df = read_csv_typed(csv_path, **csv_options(spec))
+        except (OSError, pd.errors.EmptyDataError) as e:
+            print(f"Skipping {csv_path}: {e}")
+            continue
+        write_table(df, csv_path, **spec)
+
+
+if __name__ == "__main__":
+    build_all_tables()
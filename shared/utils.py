@@ -1,11 +1,15 @@
 #shared/utils.py
 
 import pandas as pd
+import numpy as np
 import math
+import os
+import hashlib
 from datetime import datetime, timedelta
 import pytz
 import streamlit as st
 from typing import Iterable, Union
+from shared.manifest import dataset_entry
 
 def get_league_today(cutoff_hour_ct=3):
     """
@@ -20,6 +24,56 @@ def get_league_today(cutoff_hour_ct=3):
     else:
         return now_ct.date()
 
+def hit_rate_thresholds(values, percentages):
+    """
+    Vectorized hit rate engine.
+
+    values : array-like, shape (..., games)
+        One row of games per player (e.g. players x games). NaN marks a
+        missing game, so ragged players can be NaN-padded.
+    percentages : iterable of hit rate percentages, e.g. [60, 70, 80]
+
+    Returns an array of shape (..., len(percentages)) holding, for every
+    row, the highest floor S such that the row achieved >= S in at least
+    pct% of its games. Rows without any games get NaN.
+
+    Uses order statistics instead of scanning candidates: with the games
+    sorted high → low, the floor is the value at index ceil(pct * n) - 1.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind not in "iuf":
+        values = values.astype(float)
+
+    if values.dtype.kind == "f":
+        n = (~np.isnan(values)).sum(axis=-1)
+    else:
+        n = np.full(values.shape[:-1], values.shape[-1])
+
+    # Ascending sort keeps NaN padding at the end, so the k-th highest
+    # value of a row sits at index n - 1 - k
+    srt = np.sort(values, axis=-1)
+
+    n = n[..., None]
+    targets = np.asarray(list(percentages), dtype=float) / 100.0
+    n_safe = np.maximum(n, 1)
+
+    # Smallest hit count c with c / n >= target (same float test as a
+    # per-candidate scan), nudged by one to absorb rounding in pct * n
+    c = np.ceil(targets * n).astype(int)
+    c = np.where((c - 1) / n_safe >= targets, c - 1, c)
+    c = np.where(c / n_safe < targets, c + 1, c)
+    c = np.clip(c, 1, n_safe)
+
+    idx = np.clip(n - c, 0, None)
+    out = np.take_along_axis(srt, idx, axis=-1) if srt.shape[-1] else np.zeros(idx.shape, srt.dtype)
+
+    empty = np.broadcast_to(n == 0, out.shape)
+    if empty.any():
+        out = out.astype(float)
+        out[empty] = np.nan
+
+    return out
+
 def hit_rate_threshold(values, pct):
     """
     Returns the highest stat floor S such that
@@ -37,16 +91,128 @@ def hit_rate_threshold(values, pct):
     if values.empty:
         return 0
 
-    n = len(values)
-    target = pct / 100.0
+    arr = values.to_numpy()
+    return arr.dtype.type(hit_rate_thresholds(arr, [pct])[0])
+
+def pack_player_games(df, key, cols, max_games=None):
+    """
+    Pack a long game log into a NaN-padded [players, games, stats] array.
+
+    df must already be sorted most-recent-first within each key, so
+    window slices like [:, :5] are a player's last 5 games.
+
+    Returns (keys, tensor, lengths) where keys are in order of first
+    appearance (matching groupby(key, sort=False)) and lengths is the
+    number of games packed per player. With max_games the games axis is
+    padded to exactly max_games.
+    """
+    key_cols = [key] if isinstance(key, str) else list(key)
+
+    codes = df.groupby(key_cols, sort=False, observed=True).ngroup()
+    mask = codes.notna().to_numpy().copy()
+    codes = codes.to_numpy()[mask].astype(int)
+    pos = df[mask].groupby(key_cols, sort=False, observed=True).cumcount().to_numpy()
+
+    if max_games is not None:
+        keep = pos < max_games
+        mask[mask] = keep
+        codes, pos = codes[keep], pos[keep]
+
+    first = df[mask].drop_duplicates(subset=key_cols)[key_cols]
+    keys = list(first[key_cols[0]]) if isinstance(key, str) else list(first.itertuples(index=False, name=None))
+
+    n_players = len(keys)
+    lengths = np.bincount(codes, minlength=n_players)
+    n_games = max_games if max_games is not None else (int(lengths.max()) if n_players else 0)
 
-    # Check candidate floors from high → low
-    for s in sorted(values.unique(), reverse=True):
-        hit_rate = (values >= s).sum() / n
-        if hit_rate >= target:
-            return s
+    tensor = np.full((n_players, n_games, len(cols)), np.nan)
+    if len(cols):
+        vals = df.loc[mask, list(cols)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        tensor[codes, pos, :] = vals
 
-    return values.min()
+    return keys, tensor, lengths
+
+def recent_windows(recent_n):
+    """
+    Player windows as a list: 5 -> [5], [5, 10] -> [5, 10], None -> [].
+    None / 0 entries (ALL) are dropped; the season columns are always built.
+    """
+    windows = recent_n if isinstance(recent_n, (list, tuple)) else [recent_n]
+    return [int(w) for w in windows if w]
+
+def file_version(*paths):
+    """
+    Cheap data version for cache keys: (path, mtime, size) per file.
+    Changes whenever an ingest script rewrites one of the files.
+    """
+    version = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            version.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            version.append((path, None, None))
+    return tuple(version)
+
+def manifest_version(*paths):
+    """
+    Data version for cache keys from the ingest manifests (see
+    shared.manifest): (path, digest, rows) per file, so a cache lives
+    until the content changes. Files an ingest did not record fall back
+    to file_version.
+    """
+    version = []
+    for path in paths:
+        entry = dataset_entry(path)
+        if entry is None:
+            version.append(file_version(path)[0])
+        else:
+            version.append((path, entry["digest"], entry["rows"]))
+    return tuple(version)
+
+def file_digest(*paths):
+    """
+    Content hash of one or more files. Unlike file_version it survives a
+    git checkout, so it can be stored next to derived data files.
+    """
+    h = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def cast_like(value, dtype):
+    """
+    Cast a kernel threshold back to the source column dtype, so integer
+    stats keep displaying as integers.
+    """
+    if pd.api.types.is_integer_dtype(dtype) and not pd.isna(value):
+        return np.dtype(dtype).type(value)
+    return value
+
+def cast_column_like(vals, dtype):
+    """
+    Column version of cast_like: keep integer stats integral unless some
+    players have no value.
+    """
+    if pd.api.types.is_integer_dtype(dtype) and not np.isnan(vals).any():
+        return vals.astype(dtype)
+    return vals
+
+def fillna_values(df, value=0):
+    """
+    df.fillna(value) for the value columns only. Categorical and date
+    columns (see shared.storage) are left alone, since value is not one
+    of their categories.
+    """
+    df = df.copy()
+    cols = [
+        c for c, dtype in df.dtypes.items()
+        if not isinstance(dtype, pd.CategoricalDtype)
+        and not pd.api.types.is_datetime64_any_dtype(dtype)
+    ]
+    df[cols] = df[cols].fillna(value)
+    return df
 
 def compute_hit_rates(group: pd.DataFrame, stat_map: dict, stats_selected: list, recent_n=None, pct=0.8):
     """
@@ -123,7 +289,7 @@ def norm_name(s):
     last = parts[-1]
     return f"{first_initial} {last}"
 
-@st.cache_data(ttl=3600)
+@st.cache_data(max_entries=16)
 def get_teams_playing_on_date(schedule_data, target_date):
     """
     schedule_data: loaded JSON dict (full season)
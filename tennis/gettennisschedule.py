@@ -2,10 +2,20 @@ from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
 import pandas as pd
+import os
 import time
 import re
 from datetime import datetime, timedelta
 
+from shared.manifest import record_datasets
+from tennis.nameindex import resolve_schedule_ids
+
+# Run from the repo root: python -m tennis.gettennisschedule
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+SCHEDULE_CSV = os.path.join(DATA_DIR, "tennis_schedule.csv")
+SCHEDULE_IDS_CSV = os.path.join(DATA_DIR, "tennis_schedule_ids.csv")  # one row per scheduled player
+
 # -------------------
 # Function Definitions
 # -------------------
@@ -135,15 +145,24 @@ def scrape_espn_scoreboard(target_date: datetime):
 # -------------------
 # Run scraper for today and tomorrow
 # -------------------
-today = datetime.today()
-tomorrow = today + timedelta(days=1)
+if __name__ == "__main__":
+    today = datetime.today()
+    tomorrow = today + timedelta(days=1)
+
+    df_today = scrape_espn_scoreboard(today)
+    df_tomorrow = scrape_espn_scoreboard(tomorrow)
+
+    # Combine
+    combined_df = pd.concat([df_today, df_tomorrow], ignore_index=True)
 
-df_today = scrape_espn_scoreboard(today)
-df_tomorrow = scrape_espn_scoreboard(tomorrow)
+    # Save CSV
+    combined_df.to_csv(SCHEDULE_CSV, index=False)
+    print(combined_df)
 
-# Combine
-combined_df = pd.concat([df_today, df_tomorrow], ignore_index=True)
+    # Resolve names to player_id once, here, so the app joins on ids
+    schedule_ids = resolve_schedule_ids(combined_df)
+    schedule_ids.to_csv(SCHEDULE_IDS_CSV, index=False)
 
-# Save CSV
-combined_df.to_csv("data/tennis_schedule.csv", index=False)
-print(combined_df)
\ No newline at end of file
+    unmatched = schedule_ids.loc[schedule_ids["player_id"].isna(), "Player"].unique()
+    print(f"Saved {len(schedule_ids)} scheduled players -> {SCHEDULE_IDS_CSV} ({len(unmatched)} names unmatched)")
+    record_datasets(SCHEDULE_CSV, SCHEDULE_IDS_CSV)
@@ -1,9 +1,21 @@
 # tennis/helpers.py
 
+import os
 import pandas as pd
+import numpy as np
 import streamlit as st
 from datetime import datetime, timedelta
-from shared.utils import hit_rate_threshold, trim_df_to_recent_82
+from shared.utils import (
+    hit_rate_thresholds,
+    pack_player_games,
+    cast_column_like,
+    recent_windows,
+    manifest_version,
+    trim_df_to_recent_82,
+)
+from shared.storage import read_table
+from shared.hitratecube import write_cube, load_hit_rate_cube, cube_lookup
+from tennis.nameindex import resolve_schedule_ids
 
 # --- Surface / positional mapping ---
 SURFACE_BUCKET_MAP = {
@@ -22,14 +34,46 @@ TENNIS_STAT_MAP = {
     "MW": "match_win"
 }
 
-@st.cache_data(ttl=300)
-def load_tennis_schedule():
-    df = pd.read_csv("data/tennis_schedule.csv")
+def tennis_gamelog_path(tour):
+    return f"tennis/data/{tour.lower()}_player_gamelogs.csv"
+
+TENNIS_PLAYERS_CSV = "tennis/data/tennisplayers.csv"
+TENNIS_SCHEDULE_CSV = "tennis/data/tennis_schedule.csv"
+TENNIS_SCHEDULE_IDS_CSV = "tennis/data/tennis_schedule_ids.csv"
+
+# Schedule loaders are cached until schedule_version changes (the manifest
+# entries of the schedule files, see tennis_slate_version)
+@st.cache_data(max_entries=2)
+def load_tennis_schedule(schedule_version=None):
+    df = pd.read_csv(TENNIS_SCHEDULE_CSV)
     df["Date"] = pd.to_datetime(df["Date"], errors="coerce").dt.date
     return df
 
-@st.cache_data(ttl=3600)
-def load_tennis_raw_data(tour="WTA"):
+@st.cache_data(max_entries=2)
+def load_tennis_schedule_ids(schedule_version=None):
+    """
+    {date: set of player_id} for the scheduled players, from the ids file
+    gettennisschedule.py writes at scrape time. A schedule scraped before
+    that file existed is resolved here instead.
+    """
+    if os.path.exists(TENNIS_SCHEDULE_IDS_CSV):
+        players = pd.read_csv(TENNIS_SCHEDULE_IDS_CSV)
+    else:
+        players = resolve_schedule_ids(pd.read_csv(TENNIS_SCHEDULE_CSV))
+
+    players = players.dropna(subset=["player_id"])
+    dates = pd.to_datetime(players["Date"], errors="coerce").dt.date
+    return {date: set(ids) for date, ids in players.groupby(dates)["player_id"]}
+
+def scheduled_player_ids(dates, schedule_version=None):
+    """
+    player_ids with a match on any of dates.
+    """
+    schedule_ids = load_tennis_schedule_ids(schedule_version)
+    return set().union(*(schedule_ids.get(date, set()) for date in dates))
+
+@st.cache_data(max_entries=2)
+def load_tennis_raw_data(tour="WTA", data_version=None):
     """
     Load tennis gamelogs (WTA or ATP) and prepare a 'raw-data' dataframe
     compatible with the NBA pipeline in app.py.
@@ -38,12 +82,14 @@ def load_tennis_raw_data(tour="WTA"):
     ----------
     tour : str
         "WTA" or "ATP". Determines which gamelog CSV to load.
+    data_version : tuple | None
+        tennis_data_version(tour); only part of the cache key.
     """
-    gamelog_path = f"{tour.lower()}_player_gamelogs.csv"
-    players_path = "tennisplayers.csv"
+    gamelog_path = tennis_gamelog_path(tour)
+    players_path = TENNIS_PLAYERS_CSV
 
     # --- Load gamelogs ---
-    df = pd.read_csv(gamelog_path, dtype=str)
+    df = read_table(gamelog_path)
 
     # Ensure numeric stats
     numeric_cols = ["games_won", "games_lost", "game_diff", "total_games", "match_win"]
@@ -52,7 +98,7 @@ def load_tennis_raw_data(tour="WTA"):
             df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
 
     # --- Load players for display names ---
-    players = pd.read_csv(players_path, dtype=str)
+    players = read_table(players_path)
     players_lookup = dict(zip(players["player_id"], players["player_name"]))
 
     df["Player"] = df["player_id"].map(players_lookup).fillna(df["player_id"])
@@ -80,7 +126,86 @@ def load_tennis_raw_data(tour="WTA"):
 
     return df
 
-def compute_tennis_percentiles(df: pd.DataFrame, stats_selected: list, percentages: list, recent_n=None):
+def tennis_data_version(tour):
+    """
+    Version stamp of a tour's game log and the players file (their
+    manifest entries), used as a cache key.
+    """
+    return manifest_version(tennis_gamelog_path(tour), TENNIS_PLAYERS_CSV)
+
+def build_tennis_surface_store(df, stats=None):
+    """
+    Pack tennis logs into a columnar "(player, surface) x game" store.
+
+    Returns a dict with:
+      keys         : (player_id, surface) per tensor row
+      index        : {(player_id, surface): row}
+      next_surface : {player_id: surface of the most recent match}
+      stats        : stat columns along the last tensor axis
+      values       : float array [rows, games, stats], most recent game
+                     first, NaN-padded past each row's last game
+      lengths      : number of games per row
+      dtypes       : source dtype per stat (ints stay ints on output)
+      info         : per-row frame (Player, Opp) from the most recent game
+
+    A player's games on their next surface are then one row,
+    values[index[(pid, next_surface[pid])]], with no filtering.
+    """
+    df = df.copy()
+    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"], errors="coerce")
+    if stats is None:
+        stats = list(TENNIS_STAT_MAP.values())
+    stats = [s for s in stats if s in df.columns]
+
+    recent_df = df.sort_values("GAME_DATE", ascending=False, kind="stable")
+    keys, values, lengths = pack_player_games(recent_df, ["player_id", "PosBucket"], stats)
+
+    latest = recent_df.drop_duplicates("player_id")
+    info = (
+        recent_df.drop_duplicates(["player_id", "PosBucket"])[["Player", "Opp"]]
+                 .reset_index(drop=True)
+    )
+
+    return {
+        "keys": keys,
+        "index": {key: i for i, key in enumerate(keys)},
+        "next_surface": dict(zip(latest["player_id"], latest["PosBucket"])),
+        "stats": stats,
+        "values": values,
+        "lengths": lengths,
+        "dtypes": {s: df[s].dtype for s in stats},
+        "info": info,
+    }
+
+@st.cache_resource(max_entries=2)
+def load_tennis_surface_store(tour="WTA", data_version=None):
+    """
+    Surface store for one tour, from the same 82-game trimmed log the app
+    calculates on. Pass tennis_data_version(tour) so a new ingest
+    triggers a rebuild; shared across sessions, so do not modify it.
+    """
+    df = load_tennis_raw_data(tour=tour, data_version=data_version)
+    return build_tennis_surface_store(trim_df_to_recent_82(df))
+
+def next_surface_rows(store, player_ids):
+    """
+    (player_ids, surfaces, rows) for the players in the store, with each
+    player's row of games on the surface of their next match.
+    """
+    next_surface = store["next_surface"]
+    pids = [pid for pid in player_ids if pid in next_surface]
+    surfaces = [next_surface[pid] for pid in pids]
+    rows = np.array([store["index"][key] for key in zip(pids, surfaces)], dtype=int)
+    return pids, surfaces, rows
+
+def compute_tennis_percentiles(
+    df: pd.DataFrame,
+    stats_selected: list,
+    percentages: list,
+    recent_n=None,
+    hit_rate_cube=None,
+    surface_store=None,
+):
     """
     Compute hit rate thresholds for tennis players, filtered by the surface of their next match.
     Only past games on the same surface are considered for percentiles.
@@ -92,63 +217,153 @@ def compute_tennis_percentiles(df: pd.DataFrame, stats_selected: list, percentag
     stats_selected : list
         List of stats to compute, e.g. ["GW","GL","GD","TG","MW"]
     percentages : list
-        List of hit rate percentages, e.g. [80] for 80%
-    recent_n : int | None
-        Number of most recent games to consider. None = all games on same surface.
+        List of hit rate percentages, e.g. [80] for 80% or [60, 70, 80, 90]
+    recent_n : int | list | None
+        Recent window(s) reported next to the all-games columns, e.g. 5 or
+        [5, 10]. None = all games on same surface only.
+    hit_rate_cube : dict | None
+        Precomputed thresholds from load_tennis_hit_rate_cube(); built from the
+        82-game trimmed log, so pass trim_df_to_recent_82 output as df.
+    surface_store : dict | None
+        Prebuilt store from load_tennis_surface_store(); df then only selects
+        which players are reported, in df order. Built from df when missing.
 
     Returns
     -------
     pd.DataFrame
         Player-level summary with thresholds per stat
     """
+    stat_cols = [TENNIS_STAT_MAP.get(stat) for stat in stats_selected]
+    if surface_store is None or not set(filter(None, stat_cols)) <= set(surface_store["stats"]):
+        surface_store = build_tennis_surface_store(df)
 
-    df = df.copy()
-    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"], errors="coerce")
+    pids, surfaces, rows = next_surface_rows(surface_store, df["player_id"].unique())
+    info = surface_store["info"].iloc[rows]
 
-    results = []
+    summary_df = pd.DataFrame({
+        "player_id": pids,
+        "Player": info["Player"].to_numpy(),
+        "Opp": info["Opp"].to_numpy(),
+        "Surface": surfaces,
+        "Gms": surface_store["lengths"][rows],
+    })
 
-    for pid, group in df.groupby("player_id", sort=False):
-        group = group.sort_values("GAME_DATE", ascending=False)
-        if group.empty:
-            continue
+    # Hit rate thresholds: cube lookups, else one kernel call per window
+    # for every selected stat at once
+    stat_pos = {col: j for j, col in enumerate(surface_store["stats"])}
+    cols = [col for col in stat_cols if col in stat_pos]
+    values = surface_store["values"][rows][:, :, [stat_pos[col] for col in cols]]
+    games = np.moveaxis(values, 1, -1)  # players x stats x games
+
+    def window_thresholds(window):
+        batch = None
+        thresholds = {}
+        for j, col in enumerate(cols):
+            thr = cube_lookup(hit_rate_cube, pids, col, percentages, window)
+            if thr is None:
+                if batch is None:
+                    batch = hit_rate_thresholds(games[..., :window], percentages)
+                thr = batch[:, j]
+            thresholds[col] = thr
+        return thresholds
 
-        # Identify next match surface
-        next_surface = group["PosBucket"].iloc[0]
-        surface_group = group[group["PosBucket"] == next_surface]
+    thr_all = window_thresholds(None)
+    thr_recent = {
+        window: {col: np.nan_to_num(thr, nan=0) for col, thr in window_thresholds(window).items()}
+        for window in recent_windows(recent_n)
+    }
 
-        if surface_group.empty:
+    for stat, col in zip(stats_selected, stat_cols):
+        if col not in stat_pos:
+            summary_df[stat] = None
             continue
 
-        row = {
-            "player_id": pid,
-            "Player": surface_group["Player"].iloc[0],
-            "Opp": surface_group["Opp"].iloc[0],
-            "Surface": next_surface,
-            "Gms": len(surface_group),
-        }
+        dtype = surface_store["dtypes"][col]
+        for k, pct in enumerate(percentages):
+            summary_df[f"{stat}@{pct}"] = cast_column_like(thr_all[col][:, k], dtype)
 
-        for stat in stats_selected:
-            col = TENNIS_STAT_MAP.get(stat)
-            if col not in surface_group.columns:
-                row[stat] = None
-                continue
+            for window, thr in thr_recent.items():
+                summary_df[f"L{window}{stat}@{pct}"] = cast_column_like(thr[col][:, k], dtype)
 
-            vals_all = pd.to_numeric(surface_group[col], errors="coerce").dropna()
-            if vals_all.empty:
-                row[stat] = None
-                continue
+    return summary_df
 
-            vals_recent = (
-                pd.to_numeric(surface_group.head(recent_n)[col], errors="coerce").dropna()
-                if recent_n else None
-            )
+def tennis_slate_version():
+    """
+    Version stamp of the schedule side of a table: the date and the
+    schedule files.
+    """
+    return datetime.today().date(), manifest_version(TENNIS_SCHEDULE_IDS_CSV, TENNIS_SCHEDULE_CSV)
 
-            for pct in percentages:
-                row[f"{stat}@{pct}"] = hit_rate_threshold(vals_all, pct)
+@st.cache_data(max_entries=32, show_spinner=False)
+def tennis_hit_rate_table(
+    tour,
+    data_version,
+    slate_version,
+    stats_selected,
+    percentages,
+    recent_n,
+    players_with_match,
+):
+    """
+    The tennis Calculate table, sorted. Cached per (tour, data_version,
+    slate_version, form inputs) and shared across sessions; the least
+    recently used of the 32 entries is dropped first. Pass
+    tennis_data_version(tour) and tennis_slate_version().
+    """
+    df = load_tennis_raw_data(tour=tour, data_version=data_version)
+
+    # Trim to most recent 82 games per player
+    df_calc = trim_df_to_recent_82(df)
+
+    if players_with_match:
+
+        # Scheduled players were resolved to player_id at scrape time
+        today, schedule_version = slate_version
+        tomorrow = today + timedelta(days=1)
+        scheduled_ids = scheduled_player_ids([today, tomorrow], schedule_version)
+
+        # Filter gamelog df to only scheduled players
+        df_calc = df_calc[df_calc["player_id"].isin(scheduled_ids)]
+
+    # Compute surface-aware percentiles
+    summary_df = compute_tennis_percentiles(
+        df_calc,
+        stats_selected,
+        percentages,
+        recent_n=recent_n,
+        hit_rate_cube=load_tennis_hit_rate_cube(tour),
+        surface_store=load_tennis_surface_store(tour, data_version)
+    )
+
+    # Sort by first stat selected
+    sort_col = f"{stats_selected[0]}@{percentages[0]}"
+    if sort_col in summary_df.columns:
+        summary_df = summary_df.sort_values(sort_col, ascending=False)
+
+    return summary_df
+
+# --- Precomputed hit rate cubes ---
+def tennis_hit_rate_cube_path(tour):
+    return f"tennis/data/{tour.lower()}_hitrates"
+
+def build_tennis_hit_rate_cube(tour="WTA"):
+    """
+    Precompute surface-aware thresholds for every stat / pct / window,
+    from the same 82-game trimmed log the app passes in.
+    """
+    try:
+        df = load_tennis_raw_data(tour=tour)
+    except pd.errors.EmptyDataError:
+        print(f"No {tour} gamelogs yet, skipping hit rate cube.")
+        return None
 
-                if recent_n and vals_recent is not None:
-                    row[f"L{recent_n}{stat}@{pct}"] = hit_rate_threshold(vals_recent, pct)
+    store = build_tennis_surface_store(trim_df_to_recent_82(df))
+    pids, _, rows = next_surface_rows(store, list(store["next_surface"]))
 
-        results.append(row)
+    return write_cube(
+        tennis_hit_rate_cube_path(tour), pids, store["stats"], store["values"][rows],
+        [tennis_gamelog_path(tour)]
+    )
 
-    return pd.DataFrame(results)
+def load_tennis_hit_rate_cube(tour="WTA"):
+    return load_hit_rate_cube(tennis_hit_rate_cube_path(tour), tennis_data_version(tour))
@@ -0,0 +1,306 @@
+import json
+import os
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+from shared.utils import file_digest
+
+# ==================================================
+# Scoreboard name -> player_id resolution
+# ==================================================
+# Lookup order for a scoreboard name ("De Minaur A."):
+#   1. memo      : earlier resolutions, per tour and season, on disk
+#   2. aliases   : hand-kept table for names the rules get wrong
+#   3. exact key : "last first_initial" from the players file
+#   4. fuzzy     : trigram candidates with the same initial, best
+#                  SequenceMatcher score >= FUZZY_MIN_SCORE
+#
+# Full names from the ESPN schedule ("Alex de Minaur") go through
+# lookup(name, full_name=True): the full name itself (either word order),
+# then the same key / fuzzy steps.
+#
+# The memo is dropped whenever the players or aliases file changes (ids
+# can move, a new alias can fix a name), and only matches are saved: an
+# unmatched name is looked up again on the next run.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+PLAYERS_FILE = os.path.join(DATA_DIR, "tennisplayers.csv")
+ALIASES_FILE = os.path.join(DATA_DIR, "tennis_name_aliases.csv")  # tour,name,player_id
+MEMO_FILE = os.path.join(DATA_DIR, "tennis_name_memo.json")
+
+TOURS = ["ATP", "WTA"]
+
+FUZZY_MIN_SCORE = 90
+FUZZY_CANDIDATES = 10
+
+# ------------------------
+# Name keys: "last first_initial"
+# ------------------------
+def normalize_names(names):
+    """
+    Lowercase ASCII names without punctuation: accents folded, hyphens
+    split into words, anything else that is not a letter dropped.
+    """
+    return (
+        names.fillna("").astype(str)
+        .str.normalize("NFKD")
+        .str.encode("ascii", errors="ignore").str.decode("ascii")
+        .str.lower()
+        .str.replace(r"[.,'’]", "", regex=True)
+        .str.replace("-", " ", regex=False)
+        .str.replace(r"[^a-z ]", "", regex=True)
+        .str.split().str.join(" ")
+    )
+
+def player_name_keys(names):
+    """
+    Keys for full names from the players file: "Alex de Minaur" -> "minaur a".
+    """
+    parts = normalize_names(names).str.split()
+    keys = parts.str[-1] + " " + parts.str[0].str[0]
+    return keys.where(parts.str.len() >= 2)
+
+def scoreboard_name_keys(names):
+    """
+    Keys for scoreboard names: "De Minaur A." -> "minaur a",
+    "Schmiedlova A.K." -> "schmiedlova a".
+    """
+    parts = normalize_names(names).str.split()
+    keys = parts.str[-2] + " " + parts.str[-1].str[0]
+    return keys.where(parts.str.len() >= 2)
+
+def build_player_lookup(players_df, tour):
+    """
+    {name key: player_id} for one tour (later rows win on a clash).
+    """
+    players = players_df[players_df["tour"] == tour]
+    keys = player_name_keys(players["player_name"])
+    valid = keys.notna()
+    return dict(zip(keys[valid], players.loc[valid, "player_id"]))
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# ------------------------
+# Index
+# ------------------------
+class NameIndex:
+    """
+    Resolves scoreboard names for one tour. resolve_names() looks each
+    distinct (name, season) up once; save() writes new resolutions to
+    the memo so later runs skip them entirely.
+    """
+
+    def __init__(self, tour, players_file=PLAYERS_FILE, aliases_file=ALIASES_FILE, memo_file=MEMO_FILE):
+        self.tour = tour
+        self.memo_file = memo_file
+        self.players_digest = file_digest(players_file)
+        self.aliases_digest = file_digest(aliases_file) if os.path.exists(aliases_file) else None
+
+        players = pd.read_csv(players_file)
+        self.exact = build_player_lookup(players, tour)
+
+        players = players[players["tour"] == tour]
+        self.full_names = dict(zip(normalize_names(players["player_name"]), players["player_id"]))
+
+        self.aliases = {}
+        if os.path.exists(aliases_file):
+            aliases = pd.read_csv(aliases_file, dtype=str)
+            aliases = aliases[aliases["tour"] == tour]
+            self.aliases = dict(zip(normalize_names(aliases["name"]), aliases["player_id"]))
+
+        # initial -> trigram -> surnames, for fuzzy candidates
+        self.trigram_index = defaultdict(lambda: defaultdict(set))
+        for key in self.exact:
+            surname, initial = key.rsplit(" ", 1)
+            for tri in trigrams(surname):
+                self.trigram_index[initial][tri].add(surname)
+
+        self.memo = self._load_memo()
+        self.changed = False
+        self.stats = defaultdict(int)
+
+    def _load_memo(self):
+        try:
+            with open(self.memo_file, "r", encoding="utf-8") as f:
+                memo = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if not self._memo_current(memo):
+            return {}
+        return {
+            season: names
+            for season, names in memo.get("seasons", {}).items()
+            if season.startswith(f"{self.tour}:")
+        }
+
+    def _memo_current(self, memo):
+        return (
+            memo.get("players_digest") == self.players_digest
+            and memo.get("aliases_digest") == self.aliases_digest
+        )
+
+    def fuzzy(self, key):
+        """
+        Closest known key with the same initial, or None.
+        """
+        surname, initial = key.rsplit(" ", 1)
+        by_trigram = self.trigram_index.get(initial, {})
+
+        shared = defaultdict(int)
+        for tri in trigrams(surname):
+            for candidate in by_trigram.get(tri, ()):
+                shared[candidate] += 1
+        candidates = sorted(shared, key=shared.get, reverse=True)[:FUZZY_CANDIDATES]
+
+        best, best_score = None, 0
+        for candidate in candidates:
+            score = SequenceMatcher(None, surname, candidate).ratio() * 100
+            if score > best_score:
+                best, best_score = candidate, score
+
+        if best_score >= FUZZY_MIN_SCORE:
+            return self.exact[f"{best} {initial}"]
+        return None
+
+    def lookup(self, name, fuzzy=True, full_name=False):
+        """
+        Resolve one scoreboard name (or, with full_name=True, a
+        "First Last" name) without the memo.
+        """
+        normalized = normalize_names(pd.Series([name])).iloc[0]
+        if normalized in self.aliases:
+            self.stats["alias"] += 1
+            return self.aliases[normalized]
+
+        if full_name:
+            # ESPN writes some names family name first ("Zhang Shuai")
+            for candidate in (normalized, " ".join(reversed(normalized.split()))):
+                if candidate in self.full_names:
+                    self.stats["exact"] += 1
+                    return self.full_names[candidate]
+
+        name_keys = player_name_keys if full_name else scoreboard_name_keys
+        key = name_keys(pd.Series([name])).iloc[0]
+        if pd.isna(key):
+            self.stats["unmatched"] += 1
+            return None
+
+        if key in self.exact:
+            self.stats["exact"] += 1
+            return self.exact[key]
+
+        pid = self.fuzzy(key) if fuzzy else None
+        self.stats["fuzzy" if pid else "unmatched"] += 1
+        return pid
+
+    def resolve(self, name, season=None):
+        bucket = self.memo.setdefault(f"{self.tour}:{season}", {})
+        if name in bucket:
+            self.stats["memo"] += 1
+            return bucket[name]
+
+        pid = self.lookup(name)
+        bucket[name] = pid
+        self.changed = True
+        return pid
+
+    def resolve_names(self, names, seasons=None):
+        """
+        player_id per scoreboard name (NaN when unmatched). seasons is an
+        optional aligned Series (e.g. match year) for the memo.
+        """
+        if seasons is None:
+            seasons = pd.Series("all", index=names.index)
+        pairs = pd.DataFrame({"name": names, "season": seasons.astype(str)})
+
+        resolved = {
+            (name, season): self.resolve(name, season)
+            for name, season in pairs.dropna().drop_duplicates().itertuples(index=False, name=None)
+        }
+        ids = [resolved.get(pair) for pair in pairs.itertuples(index=False, name=None)]
+        return pd.Series(ids, index=names.index, dtype=object)
+
+    def unmatched(self):
+        return sorted(
+            name
+            for names in self.memo.values()
+            for name, pid in names.items()
+            if pid is None
+        )
+
+    def save(self):
+        """
+        Write this tour's matches back to the memo, keeping other tours'
+        entries. Unmatched names (None) stay in memory for this run only.
+        """
+        if not self.changed:
+            return
+
+        try:
+            with open(self.memo_file, "r", encoding="utf-8") as f:
+                memo = json.load(f)
+        except (OSError, ValueError):
+            memo = {}
+        if not self._memo_current(memo):
+            memo = {"players_digest": self.players_digest, "aliases_digest": self.aliases_digest, "seasons": {}}
+
+        memo["seasons"].update({
+            season: {name: pid for name, pid in names.items() if pid is not None}
+            for season, names in self.memo.items()
+        })
+        with open(self.memo_file, "w", encoding="utf-8") as f:
+            json.dump(memo, f, indent=1, sort_keys=True)
+        self.changed = False
+
+    def summary(self):
+        s = self.stats
+        return (
+            f"{self.tour} names: {s['memo']} memoized, {s['alias']} alias, {s['exact']} exact, "
+            f"{s['fuzzy']} fuzzy, {s['unmatched']} unmatched"
+        )
+
+# ------------------------
+# Schedule
+# ------------------------
+def schedule_players(schedule_df):
+    """
+    One row per scheduled player: "Player 1" / "Player 2" melted and
+    doubles teams ("A / B") split.
+    """
+    players = schedule_df.melt(
+        id_vars=["Date", "Tournament"], value_vars=["Player 1", "Player 2"], value_name="Player"
+    )
+    players["Player"] = players["Player"].astype(str).str.split("/")
+    players = players.explode("Player")
+    players["Player"] = players["Player"].str.strip()
+    players = players[players["Player"] != ""]
+    return players[["Date", "Tournament", "Player"]].reset_index(drop=True)
+
+def resolve_schedule_ids(schedule_df, indexes=None):
+    """
+    Scheduled players with their player_id (NaN when unmatched). The
+    schedule does not say which tour a match is on, so every tour is
+    tried: exact matches in any tour first, fuzzy ones after.
+    """
+    if indexes is None:
+        indexes = [NameIndex(tour) for tour in TOURS]
+
+    players = schedule_players(schedule_df)
+
+    ids = {}
+    for fuzzy in (False, True):
+        for index in indexes:
+            for name in players["Player"].unique():
+                if name not in ids:
+                    pid = index.lookup(name, fuzzy=fuzzy, full_name=True)
+                    if pid is not None:
+                        ids[name] = pid
+
+    players["player_id"] = players["Player"].map(ids)
+    return players
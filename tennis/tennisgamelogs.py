@@ -0,0 +1,134 @@
+import os
+import sys
+import pandas as pd
+
+from shared.manifest import record_datasets
+from tennis.nameindex import NameIndex
+
+# ==================================================
+# Player game logs from tennis-data.co.uk match logs
+# ==================================================
+# One row per player per match (winner and loser), shared by ATP and WTA:
+#
+#   python -m tennis.tennisgamelogs WTA          (append new match dates)
+#   python -m tennis.tennisgamelogs ATP --full   (rebuild from scratch)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+TOUR_FILES = {
+    "ATP": ("atp_match_logs.csv", "atp_player_gamelogs.csv"),
+    "WTA": ("wta_match_logs.csv", "wta_player_gamelogs.csv"),
+}
+
+GAMELOG_COLUMNS = [
+    "player_id", "opponent", "game_date",
+    "games_won", "games_lost", "game_diff", "total_games",
+    "aces", "double_faults", "match_win",
+    "tourney_name", "tourney_level", "surface", "round",
+]
+
+MAX_SETS = 5
+
+# ------------------------
+# Game logs
+# ------------------------
+def set_games(matches, side):
+    """
+    Games won per match by "W" (winner) or "L" (loser), summed over the
+    sets where both scores are numbers.
+    """
+    total = pd.Series(0, index=matches.index)
+    for s in range(1, MAX_SETS + 1):
+        w_col, l_col = f"W{s}", f"L{s}"
+        if w_col not in matches.columns or l_col not in matches.columns:
+            continue
+        w = pd.to_numeric(matches[w_col], errors="coerce")
+        l = pd.to_numeric(matches[l_col], errors="coerce")
+        games = w if side == "W" else l
+        total += games.where(w.notna() & l.notna(), 0).astype(int)
+    return total
+
+def build_gamelogs(matches, name_index):
+    """
+    Winner and loser rows for every match whose players both resolve
+    (through name_index, a tennis.nameindex.NameIndex), in match order
+    (winner first).
+    """
+    dates = pd.to_datetime(matches["Date"], errors="coerce")
+    seasons = dates.dt.year.astype("Int64")
+    winner_id = name_index.resolve_names(matches["Winner"], seasons)
+    loser_id = name_index.resolve_names(matches["Loser"], seasons)
+
+    matched = winner_id.notna() & loser_id.notna()
+    unmatched = pd.concat([matches.loc[winner_id.isna(), "Winner"], matches.loc[loser_id.isna(), "Loser"]])
+    if not unmatched.empty:
+        print(f"Unmatched scoreboard names: {unmatched.nunique()} ({len(unmatched)} player rows skipped)")
+
+    m = matches[matched]
+    winner_id, loser_id = winner_id[matched], loser_id[matched]
+    won, lost = set_games(m, "W"), set_games(m, "L")
+
+    match_cols = {
+        "game_date": dates[matched].dt.strftime("%Y-%m-%d"),
+        "total_games": won + lost,
+        "aces": None,
+        "double_faults": None,
+        "tourney_name": m.get("Tournament"),
+        "tourney_level": m.get("Tier", m.get("Series")),  # WTA "Tier", ATP "Series"
+        "surface": m.get("Surface"),
+        "round": m.get("Round"),
+    }
+
+    winners = pd.DataFrame({
+        "player_id": winner_id, "opponent": loser_id,
+        "games_won": won, "games_lost": lost, "game_diff": won - lost,
+        "match_win": 1, **match_cols,
+    }, index=m.index)
+    losers = pd.DataFrame({
+        "player_id": loser_id, "opponent": winner_id,
+        "games_won": lost, "games_lost": won, "game_diff": lost - won,
+        "match_win": 0, **match_cols,
+    }, index=m.index)
+
+    gamelogs = pd.concat([winners, losers]).sort_index(kind="stable")
+    return gamelogs[GAMELOG_COLUMNS].reset_index(drop=True)
+
+def update_gamelogs(tour, full=False):
+    """
+    Append game logs for match dates after the last one in the output
+    (a date already there counts as complete). full=True rebuilds.
+    """
+    match_file, output_file = (os.path.join(DATA_DIR, name) for name in TOUR_FILES[tour])
+
+    name_index = NameIndex(tour)
+    print(f"{tour} players indexed:", len(name_index.exact))
+
+    matches = pd.read_csv(match_file, low_memory=False)
+
+    last_date = None
+    if not full and os.path.exists(output_file):
+        existing_dates = pd.read_csv(output_file, usecols=["game_date"])["game_date"]
+        if not existing_dates.empty:
+            last_date = existing_dates.max()
+
+    if last_date is not None:
+        match_dates = pd.to_datetime(matches["Date"], errors="coerce").dt.strftime("%Y-%m-%d")
+        matches = matches[match_dates > last_date]
+
+    gamelogs = build_gamelogs(matches, name_index)
+    name_index.save()
+    print(name_index.summary())
+
+    if last_date is None:
+        gamelogs.to_csv(output_file, index=False)
+        print(f"Saved {len(gamelogs)} player games -> {output_file}")
+    else:
+        gamelogs.to_csv(output_file, mode="a", header=False, index=False)
+        print(f"Appended {len(gamelogs)} player games after {last_date} -> {output_file}")
+    record_datasets(output_file)
+
+    return gamelogs
+
+if __name__ == "__main__":
+    update_gamelogs(sys.argv[1].upper(), full="--full" in sys.argv[2:])
@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_fixture(*parts):
+    return (FIXTURES.joinpath(*parts)).read_bytes()
+
+
+class ReplayState:
+    """
+    What the stub server serves and what it saw.
+
+    routes   : path -> (body bytes, etag or None)
+    failures : path -> list of status codes to answer first, in order
+    delay    : seconds each request is held, so concurrent ones overlap
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.failures = {}
+        self.delay = 0.0
+        self.lock = threading.Lock()
+        self.hits = {}
+        self.request_headers = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def add_json(self, path, fixture, etag=None):
+        self.routes[path] = (load_fixture(*fixture), etag)
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        state = self.server.state
+        path = self.path.split("?", 1)[0]
+        with state.lock:
+            state.hits[path] = state.hits.get(path, 0) + 1
+            state.request_headers.append(dict(self.headers))
+            state.in_flight += 1
+            state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            failures = state.failures.get(path)
+            status = failures.pop(0) if failures else None
+
+        try:
+            time.sleep(state.delay)
+
+            if status is not None:
+                self.send_response(status)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            if path not in state.routes:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            body, etag = state.routes[path]
+            if etag and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+
+@pytest.fixture
+def replay_server():
+    """
+    Local HTTP server replaying recorded api-web.nhle.com style JSON.
+    Yields (base_url, state).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ReplayHandler)
+    server.daemon_threads = True
+    server.state = ReplayState()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}", server.state
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def fixture_json(*parts):
+    return json.loads(load_fixture(*parts))
@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+from shared.espninjuries import MIN_ROWS, fetch_injury_rows, parse_injury_tables
+from tests.conftest import load_fixture
+
+pytest.importorskip("pytz")
+pytest.importorskip("unidecode")
+
+from nba import nbainjuries  # noqa: E402
+from nhl import nhlinjuries  # noqa: E402
+
+NBA_PAGE = ("espn", "nba_injuries.html")
+NHL_PAGE = ("espn", "nhl_injuries.html")
+
+
+def test_parses_nba_page():
+    rows = parse_injury_tables(load_fixture(*NBA_PAGE))
+
+    assert len(rows) == 100
+    assert rows[0] == {
+        "Player": "Trae Young",
+        "Status_raw": "Out",
+        "Comment": "Feb 19: Young (knee, quadriceps) will be re-evaluated in one week, per NBA reporter Marc Stein.",
+    }
+    tatum = next(r for r in rows if r["Player"] == "Jayson Tatum")
+    assert tatum["Status_raw"] == "Out"
+    assert '"feeling good"' in tatum["Comment"]  # entities decoded
+
+
+def test_parses_nhl_page():
+    rows = parse_injury_tables(load_fixture(*NHL_PAGE))
+
+    assert len(rows) == 94
+    assert rows[0] == {
+        "Player": "Petr Mrazek",
+        "Status_raw": "Injured Reserve",
+        "Comment": "Feb 18: Mrazek underwent season-ending hip surgery Tuesday.",
+    }
+    carlsson = next(r for r in rows if r["Player"] == "Leo Carlsson")
+    assert carlsson["Comment"] == ""
+
+
+def test_header_and_short_rows_are_skipped():
+    page = """
+    <table><thead><tr><th>NAME</th><th>POS</th><th>DATE</th><th>STATUS</th><th>COMMENT</th></tr></thead>
+    <tbody>
+      <tr><td>Only</td><td>three</td><td>cells</td></tr>
+      <tr><td> <a>Jane
+          Doe</a> </td><td>G</td><td>Mar 1</td><td><span>Out</span></td><td>  Feb 1:   ankle </td></tr>
+    </tbody></table>
+    """
+
+    assert parse_injury_tables(page) == [{"Player": "Jane Doe", "Status_raw": "Out", "Comment": "Feb 1: ankle"}]
+    assert parse_injury_tables("") == []
+    assert parse_injury_tables(b"<html><body><p>No injuries</p></body></html>") == []
+
+
+def test_fetches_page_over_http(replay_server):
+    base, state = replay_server
+    state.routes["/nba/injuries"] = (load_fixture(*NBA_PAGE), None)
+
+    start = time.perf_counter()
+    rows = fetch_injury_rows(base + "/nba/injuries")
+    elapsed = time.perf_counter() - start
+
+    assert len(rows) == 100
+    assert elapsed < 1.0  # the whole point of skipping the browser
+
+
+@pytest.mark.parametrize("scraper, fetch, page", [
+    (nbainjuries, nbainjuries.fetch_nba_injuries, NBA_PAGE),
+    (nhlinjuries, nhlinjuries.fetch_nhl_injuries, NHL_PAGE),
+])
+def test_http_page_skips_selenium(monkeypatch, replay_server, scraper, fetch, page):
+    base, state = replay_server
+    state.routes["/injuries"] = (load_fixture(*page), None)
+    monkeypatch.setattr(scraper, "ESPN_URL", base + "/injuries")
+    monkeypatch.setattr(scraper, f"{fetch.__name__}_selenium", pytest.fail)
+
+    df = fetch()
+
+    assert len(df) >= MIN_ROWS
+    assert list(df.columns) == ["Player", "Comment", "Status_norm"]
+
+
+@pytest.mark.parametrize("served", [
+    b"<html><body><table><tbody></tbody></table></body></html>",  # page without its tables
+    None,                                                        # 404
+])
+def test_falls_back_to_selenium(monkeypatch, replay_server, served):
+    base, state = replay_server
+    if served is not None:
+        state.routes["/nba/injuries"] = (served, None)
+    monkeypatch.setattr(nbainjuries, "ESPN_URL", base + "/nba/injuries")
+
+    calls = []
+    monkeypatch.setattr(nbainjuries, "fetch_nba_injuries_selenium", lambda headless=True: calls.append(headless) or "selenium")
+
+    assert nbainjuries.fetch_nba_injuries() == "selenium"
+    assert calls == [True]
+
+
+def test_normalize_injuries():
+    rows = [
+        {"Player": "A", "Status_raw": "Out", "Comment": "Feb 1: knee"},
+        {"Player": "B", "Status_raw": "Day-To-Day", "Comment": "Feb 1: ankle"},
+        {"Player": "C", "Status_raw": "Day-To-Day", "Comment": "Feb 1: listed as doubtful"},
+    ]
+    assert list(nbainjuries.normalize_injuries(rows)["Status_norm"]) == ["O", "Q", "D"]
+
+    rows = [
+        {"Player": "A", "Status_raw": "Injured Reserve", "Comment": ""},
+        {"Player": "B", "Status_raw": "Day-To-Day", "Comment": "Feb 1: a game-time decision"},
+    ]
+    df = nhlinjuries.normalize_injuries(rows)
+    assert list(df["Status_norm"]) == ["IR", "GTD"]
+    assert "Status_raw" not in df.columns
+
+    assert nbainjuries.normalize_injuries([]).empty
@@ -0,0 +1,120 @@
+import time
+
+import pytest
+import requests
+
+from shared.fetch import Fetcher, TokenBucket
+from shared.httpcache import HttpCache
+from tests.conftest import fixture_json
+
+SCHEDULE = "/v1/schedule/2025-10-06"
+BOXSCORE = "/v1/gamecenter/{}/boxscore"
+
+
+@pytest.fixture
+def nhl_api(replay_server):
+    base, state = replay_server
+    state.add_json(SCHEDULE, ("nhl", "schedule_2025-10-06.json"))
+    for gid in range(2025020001, 2025020013):
+        state.add_json(BOXSCORE.format(gid), ("nhl", "boxscore_2025020002.json"))
+    return base, state
+
+
+def test_replays_schedule_and_boxscore(nhl_api):
+    base, _ = nhl_api
+    fetcher = Fetcher(max_workers=2, rate=100)
+
+    schedule = fetcher.get_json(base + SCHEDULE)
+    game_ids = [g["id"] for day in schedule["gameWeek"] for g in day["games"]]
+    assert schedule == fixture_json("nhl", "schedule_2025-10-06.json")
+    assert 2025020002 in game_ids
+
+    box = fetcher.get_json(base + BOXSCORE.format(2025020002))
+    assert box["gameState"] == "OFF"
+    assert box["awayTeam"]["abbrev"] == "PIT"
+    assert box["playerByGameStats"]["homeTeam"]["goalies"]
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retries_throttled_and_server_errors(nhl_api, status):
+    base, state = nhl_api
+    state.failures[SCHEDULE] = [status]
+    fetcher = Fetcher(max_workers=1, rate=100, retries=2, backoff=0.01)
+
+    schedule = fetcher.get_json(base + SCHEDULE)
+
+    assert schedule["gameWeek"]
+    assert state.hits[SCHEDULE] == 2
+
+
+def test_raises_once_retries_are_used_up(nhl_api):
+    base, state = nhl_api
+    state.failures[SCHEDULE] = [500, 500, 500]
+    fetcher = Fetcher(max_workers=1, rate=100, retries=1, backoff=0.01)
+
+    with pytest.raises(requests.HTTPError):
+        fetcher.get(base + SCHEDULE)
+    assert state.hits[SCHEDULE] == 2
+
+
+def test_in_flight_requests_never_exceed_max_workers(nhl_api):
+    base, state = nhl_api
+    state.delay = 0.05
+    state.failures[BOXSCORE.format(2025020005)] = [503]
+    urls = [base + BOXSCORE.format(gid) for gid in range(2025020001, 2025020013)]
+    fetcher = Fetcher(max_workers=3, rate=1000, burst=1000, backoff=0.01)
+
+    results = list(fetcher.map_json(urls))
+
+    assert [url for url, _ in results] == urls
+    assert all(data["id"] == 2025020002 for _, data in results)
+    assert 1 < state.max_in_flight <= 3
+
+
+def test_failed_url_yields_none(nhl_api):
+    base, _ = nhl_api
+    fetcher = Fetcher(max_workers=2, rate=100, retries=0)
+
+    results = dict(fetcher.map_json([base + SCHEDULE, base + "/v1/schedule/missing"]))
+
+    assert results[base + SCHEDULE]["gameWeek"]
+    assert results[base + "/v1/schedule/missing"] is None
+
+
+def test_rate_limit_spaces_requests(nhl_api):
+    base, state = nhl_api
+    fetcher = Fetcher(max_workers=4, rate=20, burst=1)
+    urls = [base + BOXSCORE.format(gid) for gid in range(2025020001, 2025020011)]
+
+    start = time.monotonic()
+    list(fetcher.map_json(urls))
+    elapsed = time.monotonic() - start
+
+    # 10 requests at 20/s with no burst: at least 9 gaps of 50 ms
+    assert elapsed >= 0.4
+    assert sum(state.hits.values()) == 10
+
+
+def test_token_bucket_allows_burst_then_waits():
+    bucket = TokenBucket(rate=10, capacity=3)
+
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    burst = time.monotonic() - start
+    bucket.acquire()
+    waited = time.monotonic() - start
+
+    assert burst < 0.05
+    assert waited >= 0.08
+
+
+def test_fresh_cache_entries_skip_the_server(nhl_api, tmp_path):
+    base, state = nhl_api
+    fetcher = Fetcher(max_workers=1, rate=100, cache=HttpCache(str(tmp_path)))
+
+    first = fetcher.get_json(base + SCHEDULE, cache_ttl=3600)
+    second = fetcher.get_json(base + SCHEDULE, cache_ttl=3600)
+
+    assert first == second
+    assert state.hits[SCHEDULE] == 1
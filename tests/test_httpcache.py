@@ -0,0 +1,76 @@
+import json
+
+import pytest
+import requests
+
+from shared.httpcache import CachedSession, HttpCache
+
+SCHEDULE = "/v1/schedule/2025-10-06"
+
+
+@pytest.fixture
+def cached(replay_server, tmp_path):
+    base, state = replay_server
+    state.add_json(SCHEDULE, ("nhl", "schedule_2025-10-06.json"), etag='"week-1"')
+    cache = HttpCache(str(tmp_path))
+    return base + SCHEDULE, state, cache, CachedSession(requests.Session(), cache)
+
+
+def test_miss_then_fresh_hit(cached):
+    url, state, cache, session = cached
+
+    first = session.get(url, cache_ttl=3600)
+    second = session.get(url, cache_ttl=3600)
+
+    assert first.json() == second.json()
+    assert second.from_cache
+    assert state.hits[SCHEDULE] == 1
+    assert (cache.stats["miss"], cache.stats["stored"], cache.stats["hit"]) == (1, 1, 1)
+
+
+def test_stale_entry_revalidates_with_etag(cached):
+    url, state, cache, session = cached
+
+    first = session.get(url, cache_ttl=0)
+    second = session.get(url, cache_ttl=0)
+
+    assert state.hits[SCHEDULE] == 2
+    assert state.request_headers[-1].get("If-None-Match") == '"week-1"'
+    assert cache.stats["revalidated"] == 1
+    assert second.status_code == 200
+    assert second.text == first.text
+
+
+def test_changed_resource_replaces_entry(cached):
+    url, state, cache, session = cached
+    session.get(url, cache_ttl=0)
+
+    body = json.dumps({"gameWeek": []}).encode()
+    state.routes[SCHEDULE] = (body, '"week-2"')
+    changed = session.get(url, cache_ttl=0)
+    again = session.get(url, cache_ttl=0)
+
+    assert changed.json() == {"gameWeek": []}
+    assert again.json() == {"gameWeek": []}
+    assert cache.stats["stored"] == 2
+    assert cache.stats["revalidated"] == 1
+
+
+def test_permanent_entries_are_never_revalidated(cached):
+    url, state, cache, session = cached
+
+    session.get(url, cache_ttl=0, cache_permanent=lambda r: bool(r.json()["gameWeek"]))
+    session.get(url, cache_ttl=0)
+
+    assert state.hits[SCHEDULE] == 1
+    assert cache.stats["hit"] == 1
+
+
+def test_errors_are_not_stored(cached):
+    url, state, cache, session = cached
+    state.failures[SCHEDULE] = [503]
+
+    assert session.get(url, cache_ttl=3600).status_code == 503
+    assert session.get(url, cache_ttl=3600).status_code == 200
+    assert state.hits[SCHEDULE] == 2
+    assert cache.stats["stored"] == 1